@@ -1,5 +1,6 @@
 """Protocol for camera implementations."""
 
+from collections.abc import Iterator
 from types import TracebackType
 from typing import Protocol, Self
 
@@ -30,14 +31,15 @@ class Camera(Protocol):
         """
         ...
 
-    def start_recording(self, time_s: int = 600) -> list[MatLike]:
+    def start_recording(self, time_s: int = 600) -> Iterator[MatLike]:
         """Starts the camera recording routine.
 
         Args:
             time_s: The number of seconds to record, defaults to 600s (10mins).
 
         Returns:
-            A list of frames captured during the recording.
+            An iterator over the frames captured during the recording. Frames
+            are captured lazily as the iterator is consumed.
         """
         ...
 
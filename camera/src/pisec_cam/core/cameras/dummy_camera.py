@@ -1,6 +1,6 @@
 """Dummy fake camera for testing."""
 
-from collections.abc import Generator
+from collections.abc import Generator, Iterator
 from dataclasses import dataclass
 from types import TracebackType
 from typing import Self
@@ -78,14 +78,14 @@ class DummyCamera:
 
         return next(self._frames())
 
-    def start_recording(self, time_s: int = 600) -> list[MatLike]:
+    def start_recording(self, time_s: int = 600) -> Iterator[MatLike]:
         """Starts the camera recording routine.
 
         Args:
             time_s: The number of seconds to record, defaults to 600s (10mins).
 
         Returns:
-            A list of frames captured during the recording.
+            An iterator over the frames captured during the recording.
 
         Raises:
             RuntimeError: If the fake camera is not enabled.
@@ -97,10 +97,7 @@ class DummyCamera:
         frames_to_capture = int(time_s * frame_rate)
 
         print(f"Capturing {frames_to_capture} frames")
-        frames = [self.capture_frame() for _ in range(frames_to_capture)]
-        print(f"Captured {len(frames)} frames")
-
-        return frames
+        return (self.capture_frame() for _ in range(frames_to_capture))
 
     def enable(self) -> None:
         """Enables the fake camera.
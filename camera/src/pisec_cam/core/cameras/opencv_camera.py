@@ -1,6 +1,7 @@
 """Generic camera implementation using opencv."""
 
 import time
+from collections.abc import Generator, Iterator
 from dataclasses import dataclass
 from types import TracebackType
 from typing import Self
@@ -58,33 +59,52 @@ class OpenCVCamera:
             raise RuntimeError("Failed to capture frame")
         return frame
 
-    def start_recording(self, time_s: int = 600) -> list[MatLike]:
+    def start_recording(self, time_s: int = 600) -> Iterator[MatLike]:
         """Starts the camera recording routine.
 
+        Frames are yielded as soon as they are captured so they can be written
+        to disk straight away, rather than holding the whole recording in
+        memory.
+
         Args:
             time_s: The number of seconds to record, defaults to 600s (10mins).
 
         Returns:
-            A list of frames captured during the recording.
+            An iterator over the frames captured during the recording.
         """
         if self.camera is None:
             raise RuntimeError("Camera is not enabled")
 
+        return self._record_frames(self.camera, time_s)
+
+    def _record_frames(
+        self, camera: cv2.VideoCapture, time_s: int
+    ) -> Generator[MatLike, None, None]:
+        """Reads frames from the camera at a fixed frame rate [private].
+
+        Args:
+            camera: The opened camera to read the frames from.
+            time_s: The number of seconds to record.
+
+        Yields:
+            The frames captured during the recording.
+        """
         frame_rate: int = 24  # fps
         frame_time: float = 1.0 / frame_rate
 
-        frames: list[MatLike] = []
+        frames_captured: int = 0
         frames_to_capture = int(time_s * frame_rate)
         print(f"Capturing {frames_to_capture} frames")
         for i in range(frames_to_capture):
             start_time: float = time.time()
-            ret, frame = self.camera.read()
+            ret, frame = camera.read()
 
             # If the frame couldn't be captured, break early
             if not ret:
                 break
 
-            frames.append(frame)
+            yield frame
+            frames_captured += 1
             end_time: float = time.time()
             time_taken = end_time - start_time
             # Ensure sleep time isn't negative
@@ -93,9 +113,7 @@ class OpenCVCamera:
                 f"Time taken/frame time: {time_taken}/{frame_time} seconds",
                 f"\nframe: {i}/{frames_to_capture}",
             )
-        print(f"Captured {len(frames)} frames")
-
-        return frames
+        print(f"Captured {frames_captured} frames")
 
     def enable(self) -> None:
         """Enables the camera."""
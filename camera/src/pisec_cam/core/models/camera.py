@@ -4,8 +4,6 @@ from pydantic import BaseModel, Field
 
 # As long as the name starts with a letter (case-insensitive)
 camera_name_regex: str = r"^[a-zA-Z]+.*$"
-# Regex pattern for the ipv4 format
-host_address_regex: str = r"^((25[0-5]|(2[0-4]|1\d|[1-9]|)\d)\.?\b){4}$"
 # Regex pattern for the MAC address format
 mac_address_regex: str = r"^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$"
 
@@ -36,7 +34,6 @@ class Camera(BaseModel):
 
     Attributes:
         id: A camera's ID
-        host_address: A camera's host address
         name: A camera's name
         mac_address: A camera's MAC address
     """
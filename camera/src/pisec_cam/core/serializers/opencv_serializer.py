@@ -1,5 +1,6 @@
 """OpenCV based implementation of the Serializer protocol."""
 
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
 import cv2
@@ -15,25 +16,34 @@ from pisec_cam.core.exceptions.serialization import SerializationError
 class OpenCVSerializer:
     """OpenCV based implementation of the Serializer protocol."""
 
-    def write_video(self, data: list[MatLike], file_path: Path) -> None:
+    def write_video(self, data: Iterable[MatLike], file_path: Path) -> None:
         """OpenCV based implementation of the write_video method.
 
+        Frames are written as they are read from the iterable, so only one
+        frame needs to be held in memory at a time.
+
         Args:
-            data: The video data to write.
+            data: The video frames to write.
             file_path: The path to write the video to.
 
         Raises:
             SerializationError: If the video could not be written.
         """
+        frames: Iterator[MatLike] = iter(data)
+        first_frame: MatLike | None = next(frames, None)
+        if first_frame is None:
+            raise SerializationError(file_path)
+
         out = VideoWriter(
             filename=file_path,
             fourcc=VideoWriter_fourcc(*"mp4v"),  # pyright: ignore[reportUnknownArgumentType]
             fps=24.0,
-            frameSize=data[0].shape[1::-1],  # pyright: ignore[reportAny]
+            frameSize=first_frame.shape[1::-1],  # pyright: ignore[reportAny]
         )
         writer_error: Exception | None = None
         try:
-            for frame in data:
+            out.write(first_frame)
+            for frame in frames:
                 out.write(frame)
         except Exception as e:
             writer_error = e
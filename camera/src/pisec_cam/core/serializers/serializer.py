@@ -1,5 +1,6 @@
 """Generic Protocol for serialization."""
 
+from collections.abc import Iterable
 from pathlib import Path
 from typing import Protocol
 
@@ -9,11 +10,11 @@ from cv2.typing import MatLike
 class Serializer(Protocol):
     """Generic Protocol for serialization."""
 
-    def write_video(self, data: list[MatLike], file_path: Path) -> None:
+    def write_video(self, data: Iterable[MatLike], file_path: Path) -> None:
         """Writes video data to a file.
 
         Args:
-            data: The video data to write.
+            data: The video frames to write, consumed one at a time.
             file_path: The path to write the video to.
         """
         ...
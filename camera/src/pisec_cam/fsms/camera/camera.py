@@ -43,7 +43,8 @@ def _skip_record_action(_: CameraCtx) -> None:  # pyright: ignore[reportUnusedFu
     CameraState.RECORDING, CameraState.SAVING, CameraEvent.SAVE
 )
 def _save_action(context: CameraCtx) -> None:  # pyright: ignore[reportUnusedFunction]
-    if not context.data:
+    # The recorded frames are streamed, so they're captured while being saved
+    if context.data is None:
         raise ValueError("No data to save")
 
     context.file_manager.save_data(
@@ -1,5 +1,6 @@
 """Data structures used by the camera state machine."""
 
+from collections.abc import Iterator
 from dataclasses import dataclass
 
 from cv2.typing import MatLike
@@ -31,4 +32,4 @@ class CameraCtx(SMContext):
 
     settings: CameraSettings
 
-    data: list[MatLike] | None = None
+    data: Iterator[MatLike] | None = None
@@ -1,5 +1,6 @@
 """Camera service containing business logic for running the camera."""
 
+from collections.abc import Iterator
 from dataclasses import dataclass
 
 # TODO: Remove dependency on opencv for MatLike data structure
@@ -35,14 +36,14 @@ class CameraService:
             seconds: The number of seconds to record.
         """
         print(f"Recording for {seconds} seconds")
-        data: list[MatLike] = self.camera.start_recording(seconds)
-        print(f"Recorded {len(data)} frames successfully!")
+        # Frames are captured lazily, so they're written to disk as recorded
+        data: Iterator[MatLike] = self.camera.start_recording(seconds)
 
         print(f"Saving video: {generate_timestamp_video_name()}...")
         self.file_manager.save_data(
             data, generate_timestamp_video_name, self.serializer
         )
-        print("Video saved succesfully!")
+        print("Video recorded and saved succesfully!")
 
     def take_photo(self) -> None:
         """Captures a frame from the camera and saves it to a file."""
@@ -1,5 +1,6 @@
 """Manages the video files."""
 
+from collections.abc import Iterator
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -36,7 +37,7 @@ class FileManager:
 
     def save_data(
         self,
-        data: list[MatLike] | MatLike,
+        data: Iterator[MatLike] | MatLike,
         file_name_generator: FileNameGenerator,
         serializer: Serializer,
     ) -> None:
@@ -45,7 +46,7 @@ class FileManager:
         Also ensures the max number of files is not exceeded.
 
         Args:
-            data: The video or image data to save.
+            data: The video frames or image data to save.
             file_name_generator: Function to generate the file name.
             serializer: The serializer to use to save the file.
 
@@ -62,7 +63,7 @@ class FileManager:
             raise FileExistsError(file_path)
 
         # Save the data as a video or image accordingly
-        if isinstance(data, list):
+        if isinstance(data, Iterator):
             serializer.write_video(data, file_path)
         else:
             # WARN: Can raise a SerializationError
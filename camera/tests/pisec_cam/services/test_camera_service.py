@@ -1,6 +1,7 @@
 """Tests for the camera service."""
 
 import re
+from collections.abc import Iterator
 from pathlib import Path
 
 import numpy as np
@@ -25,7 +26,7 @@ def test_camera_service_record_video(mocker: MockFixture) -> None:
 
     mocked_camera = mocker.MagicMock(spec=Camera)
     mock_start_recording = mocker.patch.object(
-        mocked_camera, "start_recording", return_value=fake_data
+        mocked_camera, "start_recording", return_value=iter(fake_data)
     )
 
     mocked_serializer = mocker.MagicMock(spec=Serializer)
@@ -50,7 +51,7 @@ def test_camera_service_record_video(mocker: MockFixture) -> None:
     mock_save_data.assert_called_once()
 
     # Read passed arguments to the mocked file manager
-    actual_data: list[MatLike]
+    actual_data: Iterator[MatLike]
     file_name_generator: FileNameGenerator
     passed_serializer: Serializer
     actual_data, file_name_generator, passed_serializer = (  # pyright: ignore[reportAny]
@@ -58,7 +59,7 @@ def test_camera_service_record_video(mocker: MockFixture) -> None:
     )
 
     # Check if the data being written matches the mocked camera data
-    np.testing.assert_array_equal(actual_data, fake_data)
+    np.testing.assert_array_equal(list(actual_data), fake_data)
 
     # File manager should use the same serializer passed to the camera service
     assert passed_serializer == mocked_serializer
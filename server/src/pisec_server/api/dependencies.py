@@ -0,0 +1,21 @@
+"""Module containing dependencies shared by the API routes."""
+
+from typing import Annotated
+
+from fastapi import Query
+
+from pisec_server.api.models.general import MAX_PAGE_SIZE, PaginationParams
+
+
+def get_pagination_params(
+    page_index: Annotated[int, Query(ge=0)] = 0,
+    page_size: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = 100,
+    after_id: Annotated[int | None, Query(ge=1)] = None,
+) -> PaginationParams:
+    """Dependency to read the pagination query parameters.
+
+    FastAPI only accepts a pydantic model as the query parameters when a route has no other query parameters, so the
+    fields are declared individually here instead. They're already validated by FastAPI, so the model is built without
+    validating them again.
+    """
+    return PaginationParams.model_construct(page_index=page_index, page_size=page_size, after_id=after_id)
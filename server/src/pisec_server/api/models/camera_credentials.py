@@ -1,6 +1,6 @@
 """File containing pydantic models for camera credential data."""
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class CameraCredentialResponse(BaseModel):
@@ -17,7 +17,4 @@ class CameraCredentialCreate(BaseModel):
     client_id: str  # Kind of like a UUID
     client_secret: str
 
-    class Config:
-        """Config subclass for CameraCredential."""
-
-        from_attributes: bool = True
+    model_config = ConfigDict(from_attributes=True)
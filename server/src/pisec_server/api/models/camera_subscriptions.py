@@ -1,6 +1,6 @@
 """File containing pydantic models for camera subscription data."""
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class CameraSubscription(BaseModel):
@@ -9,7 +9,4 @@ class CameraSubscription(BaseModel):
     user_id: int = Field(ge=1)
     camera_id: int = Field(ge=1)
 
-    class Config:
-        """Config subclass of CameraSubscription."""
-
-        from_attributes: bool = True
+    model_config = ConfigDict(from_attributes=True)
@@ -1,6 +1,6 @@
 """File containing pydantic models for camera data."""
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from pisec_server.core.validation.regex import camera_name_regex, mac_address_regex
 
@@ -15,10 +15,7 @@ class CameraResponse(BaseModel):
     name: str = Field(pattern=camera_name_regex)
     mac_address: str = Field(pattern=mac_address_regex)
 
-    class Config:
-        """Config subclass of CameraResponse."""
-
-        from_attributes: bool = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class Camera(BaseModel):
@@ -29,10 +26,7 @@ class Camera(BaseModel):
     auth_key: str
     mac_address: str = Field(pattern=mac_address_regex)
 
-    class Config:
-        """Config subclass of Camera."""
-
-        from_attributes: bool = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class CameraCreate(BaseModel):
@@ -4,6 +4,9 @@ from typing import Annotated
 
 from pydantic import BaseModel, Field
 
+# Largest page that can be requested, so a single request can't load a whole table into memory
+MAX_PAGE_SIZE: int = 1000
+
 
 class PaginationParams(BaseModel):
     """Re-usable model for pagination.
@@ -12,4 +15,11 @@ class PaginationParams(BaseModel):
     """
 
     page_index: Annotated[int, Field(default=0, ge=0)]
-    page_size: Annotated[int, Field(default=100, ge=1)]
+    page_size: Annotated[int, Field(default=100, ge=1, le=MAX_PAGE_SIZE)]
+    # ID of the last record of the previous page (keyset pagination, which is faster than page_index for deep pages)
+    after_id: Annotated[int | None, Field(default=None, ge=1)]
+
+    @property
+    def offset(self) -> int:
+        """Number of records to skip to reach the start of the page."""
+        return self.page_index * self.page_size
@@ -2,7 +2,7 @@
 
 from typing import Annotated
 
-from pydantic import AfterValidator, BaseModel, EmailStr, Field
+from pydantic import AfterValidator, BaseModel, ConfigDict, EmailStr, Field
 
 from pisec_server.core.validation.regex import email_regex
 from pisec_server.core.validation.user_validation import password_validator
@@ -25,10 +25,7 @@ class User(UserWithPassword):
 
     id: int = Field(ge=1)
 
-    class Config:
-        """Config subclass of User."""
-
-        from_attributes: bool = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserCreate(UserWithPassword):
@@ -50,7 +47,4 @@ class UserResponse(BaseUser):
     id: int = Field(ge=1)
     is_admin: bool = Field(default=False)
 
-    class Config:
-        """Config subclass of UserResponse."""
-
-        from_attributes: bool = True
+    model_config = ConfigDict(from_attributes=True)
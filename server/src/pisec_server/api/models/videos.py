@@ -2,7 +2,7 @@
 
 from datetime import datetime
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from pisec_server.core.validation.regex import file_name_regex
 
@@ -15,10 +15,7 @@ class Video(BaseModel):
     camera_id: int = Field(ge=1)
     uploaded_at: datetime
 
-    class Config:
-        """Config subclass of Video."""
-
-        from_attributes: bool = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class VideoCreate(BaseModel):
@@ -0,0 +1,81 @@
+"""Helpers for serializing database records straight into JSON responses."""
+
+from collections.abc import Iterable, Iterator
+from enum import IntEnum
+from functools import cache
+from hashlib import blake2b
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import to_json
+
+
+class CachePolicy(IntEnum):
+    """How long (in seconds) clients may reuse a response before requesting it again."""
+
+    SHORT = 5  # Data that changes often (e.g. a camera's videos)
+    NORMAL = 20
+    LONG = 60  # Data that rarely changes (e.g. a camera's details)
+
+
+def cache_response(request: Request, response: Response, policy: CachePolicy) -> Response:
+    """Lets the client cache a response for the duration of the given policy, then revalidate it by its ETag.
+
+    Responses are marked as private and vary by the Authorization header, so they're never shared between users. If
+    the client already has the same response (its If-None-Match header matches the ETag), an empty 304 response is
+    sent instead.
+    """
+    etag = f'"{blake2b(response.body, digest_size=8).hexdigest()}"'
+    headers = {"Cache-Control": f"private, max-age={policy.value}", "Vary": "Authorization", "ETag": etag}
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return response
+
+
+def construct_model[ModelT: BaseModel](model: type[ModelT], record: object) -> ModelT:
+    """Builds a pydantic model from the matching attributes of a record, skipping validation.
+
+    Only use this on records read from the database, as they were already validated before being stored.
+    """
+    return model.model_construct(**{name: getattr(record, name) for name in model.model_fields})  # pyright: ignore[reportAny]
+
+
+@cache
+def _list_adapter[ModelT: BaseModel](model: type[ModelT]) -> TypeAdapter[list[ModelT]]:
+    """Builds (once per model) a type adapter for a list of the given pydantic model."""
+    return TypeAdapter(list[model])  # type: ignore[valid-type]  # pyright: ignore[reportInvalidTypeForm]
+
+
+def model_response(model: type[BaseModel], record: object) -> Response:
+    """Serializes a trusted record into a JSON response using the given pydantic model."""
+    return Response(content=to_json(construct_model(model, record)), media_type="application/json")
+
+
+def model_list_response(model: type[BaseModel], records: Iterable[object]) -> Response:
+    """Serializes a list of records into a JSON response using the given pydantic model.
+
+    The whole list is read and dumped by a single type adapter call, which runs in pydantic-core rather than looping
+    over every record in Python.
+    """
+    adapter = _list_adapter(model)
+    return Response(
+        content=adapter.dump_json(adapter.validate_python(records, from_attributes=True)), media_type="application/json"
+    )
+
+
+def model_ndjson_response(model: type[BaseModel], records: Iterable[object]) -> StreamingResponse:
+    """Streams records as newline-delimited JSON using the given pydantic model.
+
+    Each record is serialized as it's read, so large pages are sent without first building the whole response.
+    """
+
+    def generate_lines() -> Iterator[bytes]:
+        for record in records:
+            yield to_json(model.model_validate(record, from_attributes=True)) + b"\n"
+
+    return StreamingResponse(generate_lines(), media_type="application/x-ndjson")
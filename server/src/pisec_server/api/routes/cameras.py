@@ -1,18 +1,34 @@
 """FastAPI routes related to the Camera table."""
 
+import asyncio
+import logging
+from contextlib import suppress
+from pathlib import Path as FilePath
 from typing import Annotated
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query
+import aiofiles.os
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import Field
 from sqlalchemy.orm import Session
 
+from pisec_server.api.dependencies import get_pagination_params
 from pisec_server.api.models.camera_subscriptions import CameraSubscription
 from pisec_server.api.models.cameras import CameraCreate, CameraResponse, CameraUpdate
 from pisec_server.api.models.general import PaginationParams
 from pisec_server.api.models.users import UserResponse
 from pisec_server.api.models.videos import Video
+from pisec_server.api.responses import (
+    CachePolicy,
+    cache_response,
+    model_list_response,
+    model_ndjson_response,
+    model_response,
+)
 from pisec_server.auth.dependencies import get_current_credential, get_current_user
-from pisec_server.core.exceptions import RecordNotFoundError
+from pisec_server.core.exceptions import InvalidFileNameError, RecordInUseError, RecordNotFoundError
 from pisec_server.core.validation.regex import camera_name_regex, mac_address_regex
+from pisec_server.core.validation.video_validation import get_video_file_path_safe
 from pisec_server.db.database import get_db
 from pisec_server.db.db_models import Camera as CameraSchema
 from pisec_server.db.db_models import CameraCredential as CameraCredentialSchema
@@ -26,47 +42,73 @@ from pisec_server.services import video as video_service
 
 router = APIRouter(prefix="/cameras", tags=["cameras"])
 
+logger = logging.getLogger(__name__)
+
+# Number of video files removed at once, so deleting many videos doesn't queue a job per file in the threadpool
+FILE_REMOVAL_BATCH_SIZE: int = 16
+
+
+def _get_accessible_camera(db_session: Session, camera_id: int, current_user: UserSchema) -> CameraSchema:
+    """Gets a camera the current user is subscribed to (any camera for admins).
+
+    Raises a 404 error if the camera doesn't exist, or a 403 error if the user isn't subscribed to it.
+    """
+    result: tuple[CameraSchema, bool] | None = camera_service.get_camera_with_access(
+        db_session, camera_id, current_user.id
+    )
+    if result is None:
+        raise HTTPException(status_code=404, detail="Camera not found!")
+
+    db_camera, is_subscribed = result
+    if not (current_user.is_admin or is_subscribed):
+        raise HTTPException(status_code=403, detail="Not subscribed to this camera")
+    return db_camera
+
 
 @router.get("/me", response_model=CameraResponse)
 def get_camera_me(
     current_credential: Annotated[CameraCredentialSchema, Depends(get_current_credential)],
-) -> CameraSchema:
+) -> Response:
     """Returns a camera's details using a given ID."""
     current_camera: CameraSchema | None = current_credential.camera
     if current_camera is None:
         raise HTTPException(status_code=403, detail="No camera linked to credential!")
 
-    return current_camera
+    return model_response(CameraResponse, current_camera)
 
 
 @router.get("/", response_model=list[CameraResponse])
 def get_cameras(
+    request: Request,
     current_user: Annotated[UserSchema, Depends(get_current_user)],
-    pagination: Annotated[PaginationParams, Query()],
+    pagination: Annotated[PaginationParams, Depends(get_pagination_params)],
     db_session: Annotated[Session, Depends(get_db)],
-    camera_ids: Annotated[list[int] | None, Query(ge=1)] = None,
-    name: Annotated[str | None, Query(regex=camera_name_regex)] = None,
-    mac_address: Annotated[str | None, Query(regex=mac_address_regex)] = None,
-) -> list[CameraSchema]:
+    camera_ids: Annotated[list[Annotated[int, Field(ge=1)]] | None, Query()] = None,
+    name: Annotated[str | None, Query(pattern=camera_name_regex)] = None,
+    mac_address: Annotated[str | None, Query(pattern=mac_address_regex)] = None,
+    stream: Annotated[bool, Query()] = False,
+) -> Response:
     """Gets a list of all cameras with pagination.
 
-    Non-admin users can only see cameras they are subscribed to.
+    Non-admin users can only see cameras they are subscribed to. Set stream to receive the cameras as newline-delimited
+    JSON, sent as they're read from the database (useful for large pages).
     """
-    cameras = camera_service.get_cameras(
+    fetch_cameras = camera_service.stream_cameras if stream else camera_service.get_cameras
+    cameras = fetch_cameras(
         db_session,
         camera_ids,
         name,
         mac_address,
-        pagination.page_index * pagination.page_size,
+        pagination.offset,
         pagination.page_size,
+        # Non-admins only see cameras they're subscribed to
+        subscribed_user_id=None if current_user.is_admin else current_user.id,
+        after_id=pagination.after_id,
     )
 
-    if not current_user.is_admin:
-        # Filter to only show cameras the user is subscribed to
-        subscribed_camera_ids = {camera.id for camera in current_user.cameras}
-        cameras = [camera for camera in cameras if camera.id in subscribed_camera_ids]
-
-    return cameras
+    if stream:
+        return model_ndjson_response(CameraResponse, cameras)
+    return cache_response(request, model_list_response(CameraResponse, cameras), CachePolicy.NORMAL)
 
 
 @router.post("/", response_model=CameraResponse)
@@ -74,19 +116,19 @@ def create_camera(
     current_credential: Annotated[CameraCredentialSchema, Depends(get_current_credential)],
     camera: Annotated[CameraCreate, Body()],
     db_session: Annotated[Session, Depends(get_db)],
-) -> CameraSchema:
+) -> Response:
     """Creates a new camera with given details."""
     if current_credential.camera_id is not None:
         raise HTTPException(status_code=400, detail="Credential already linked to Camera!")
 
-    credential_owner: UserSchema | None = user_service.get_user(db_session, current_credential.user_id)
-    if not credential_owner:
+    # Only the owner's ID is needed, so check they exist without loading them
+    if not user_service.user_exists(db_session, current_credential.user_id):
         raise HTTPException(status_code=500, detail="Camera credential somehow not registered to user!")
 
     # Create a new camera record along with an initial subscription (to user owner of credential)
     new_camera: CameraSchema = camera_service.create_camera(db_session, camera)
     init_subscription: list[CameraSubscription] = subscription_service.create_camera_subscriptions_by_camera(
-        db_session, new_camera.id, [credential_owner.id]
+        db_session, new_camera.id, [current_credential.user_id]
     )
     if len(init_subscription) != 1:
         raise HTTPException(status_code=500, detail="Failed to create camera subscription!")
@@ -97,26 +139,20 @@ def create_camera(
     except RecordNotFoundError as e:
         raise HTTPException(status_code=500, detail="Failed to assign camera to user!") from e
 
-    return new_camera
+    return model_response(CameraResponse, new_camera)
 
 
 @router.get("/{camera_id}", response_model=CameraResponse)
 def get_camera(
+    request: Request,
     current_user: Annotated[UserSchema, Depends(get_current_user)],
     camera_id: Annotated[int, Path(ge=1)],
     db_session: Annotated[Session, Depends(get_db)],
-) -> CameraSchema:
+) -> Response:
     """Returns a camera's details using a given ID."""
-    db_camera: CameraSchema | None = camera_service.get_camera(db_session, camera_id)
+    db_camera: CameraSchema = _get_accessible_camera(db_session, camera_id, current_user)
 
-    if not db_camera:
-        raise HTTPException(status_code=404, detail="Camera not found!")
-
-    # Only allow access if user is subscribed to the camera or is an admin
-    if not current_user.is_admin and db_camera not in current_user.cameras:
-        raise HTTPException(status_code=403, detail="Not subscribed to this camera")
-
-    return db_camera
+    return cache_response(request, model_response(CameraResponse, db_camera), CachePolicy.LONG)
 
 
 @router.put("/{camera_id}", response_model=CameraResponse)
@@ -125,7 +161,7 @@ def update_camera(
     camera_id: Annotated[int, Path(ge=1)],
     camera: Annotated[CameraUpdate, Body()],
     db_session: Annotated[Session, Depends(get_db)],
-) -> CameraSchema:
+) -> Response:
     """Updates a camera's details using a given ID."""
     if current_credential.camera_id is None:
         raise HTTPException(status_code=403, detail="No camera linked to credential!")
@@ -137,7 +173,34 @@ def update_camera(
     except RecordNotFoundError as e:
         raise HTTPException(status_code=404, detail="Camera not found!") from e
 
-    return db_camera
+    return model_response(CameraResponse, db_camera)
+
+
+async def _remove_video_file(file_path: FilePath) -> None:
+    """Removes a video file (if it exists) without blocking the event loop."""
+    with suppress(FileNotFoundError):
+        await aiofiles.os.remove(file_path)
+
+
+async def _remove_video_files(videos: list[VideoSchema]) -> None:
+    """Removes the files of deleted videos concurrently (in batches), skipping any that are already gone.
+
+    The videos' entries are already deleted, so files that can't be removed (e.g. due to their permissions) are logged
+    rather than failing the request.
+    """
+    file_paths: list[FilePath] = []
+    for video in videos:
+        try:
+            file_paths.append(get_video_file_path_safe(video.file_name, video.camera_id))
+        except InvalidFileNameError:
+            logger.error("Failed to remove the file of video %d: Invalid file path!", video.id)
+
+    for start in range(0, len(file_paths), FILE_REMOVAL_BATCH_SIZE):
+        batch: list[FilePath] = file_paths[start : start + FILE_REMOVAL_BATCH_SIZE]
+        results = await asyncio.gather(*(_remove_video_file(file_path) for file_path in batch), return_exceptions=True)
+        for file_path, result in zip(batch, results):
+            if isinstance(result, Exception):
+                logger.error("Failed to remove video file %s: %s", file_path, result)
 
 
 @router.delete("/{camera_id}", response_model=CameraResponse)
@@ -145,8 +208,11 @@ def delete_camera(
     current_credential: Annotated[CameraCredentialSchema, Depends(get_current_credential)],
     camera_id: Annotated[int, Path(ge=1)],
     db_session: Annotated[Session, Depends(get_db)],
-) -> CameraSchema:
-    """Deletes a given camera by ID."""
+) -> Response:
+    """Deletes a given camera by ID.
+
+    Cameras with videos can't be deleted, delete their videos first.
+    """
     if current_credential.camera_id is None:
         raise HTTPException(status_code=403, detail="No camera linked to credential!")
     if current_credential.camera_id != camera_id:
@@ -156,47 +222,72 @@ def delete_camera(
         db_camera: CameraSchema = camera_service.delete_camera(db_session, camera_id=camera_id)
     except RecordNotFoundError as e:
         raise HTTPException(status_code=404, detail="Camera not found") from e
+    except RecordInUseError as e:
+        raise HTTPException(status_code=409, detail="Camera still has videos!") from e
 
-    return db_camera
+    return model_response(CameraResponse, db_camera)
 
 
 @router.get("/{camera_id}/videos", response_model=list[Video])
 def get_videos(
+    request: Request,
     current_user: Annotated[UserSchema, Depends(get_current_user)],
     camera_id: Annotated[int, Path(ge=1)],
-    pagination: Annotated[PaginationParams, Query()],
+    pagination: Annotated[PaginationParams, Depends(get_pagination_params)],
     db_session: Annotated[Session, Depends(get_db)],
-) -> list[VideoSchema]:
-    """Gets a list of all of a camera's videos with pagination."""
-    db_camera: CameraSchema | None = camera_service.get_camera(db_session, camera_id)
-    if not db_camera:
-        raise HTTPException(status_code=404, detail="Camera not found!")
+    stream: Annotated[bool, Query()] = False,
+) -> Response:
+    """Gets a list of all of a camera's videos with pagination.
 
-    # Only allow access if user is subscribed to the camera or is an admin
-    if not current_user.is_admin and db_camera not in current_user.cameras:
-        raise HTTPException(status_code=403, detail="Not subscribed to this camera")
+    Set stream to receive the videos as newline-delimited JSON, sent as they're read from the database.
+    """
+    db_camera: CameraSchema = _get_accessible_camera(db_session, camera_id, current_user)
 
-    return video_service.get_video_entries(
+    fetch_videos = video_service.stream_video_entries if stream else video_service.get_video_entries
+    videos = fetch_videos(
         db_session,
         camera_ids=[db_camera.id],
-        skip=pagination.page_index * pagination.page_size,
+        skip=pagination.offset,
         limit=pagination.page_size,
+        after_id=pagination.after_id,
     )
 
+    if stream:
+        return model_ndjson_response(Video, videos)
+    return cache_response(request, model_list_response(Video, videos), CachePolicy.SHORT)
+
+
+@router.delete("/{camera_id}/videos", response_model=list[Video])
+async def delete_videos(
+    current_user: Annotated[UserSchema, Depends(get_current_user)],
+    camera_id: Annotated[int, Path(ge=1)],
+    db_session: Annotated[Session, Depends(get_db)],
+) -> Response:
+    """Deletes all of a camera's videos (e.g. when it's decommissioned).
+
+    Users can only delete videos from cameras they are subscribed to, or admins can delete all.
+    """
+    _ = await run_in_threadpool(_get_accessible_camera, db_session, camera_id, current_user)
+
+    deleted_videos: list[VideoSchema] = await run_in_threadpool(
+        video_service.delete_video_entries_by_camera, db_session, camera_id
+    )
+
+    # The entries are deleted either way, even if some of the files can't be removed
+    await _remove_video_files(deleted_videos)
+
+    return model_list_response(Video, deleted_videos)
+
 
 @router.get("/{camera_id}/users", response_model=list[UserResponse])
 def get_users(
+    request: Request,
     current_user: Annotated[UserSchema, Depends(get_current_user)],
     camera_id: Annotated[int, Path(ge=1)],
     db_session: Annotated[Session, Depends(get_db)],
-) -> list[UserSchema]:
+) -> Response:
     """Gets a list of all of a camera's users with pagination."""
-    db_camera: CameraSchema | None = camera_service.get_camera(db_session, camera_id)
-    if not db_camera:
-        raise HTTPException(status_code=404, detail="Camera not found!")
-
-    # Only allow access if user is subscribed to the camera or is an admin
-    if not current_user.is_admin and db_camera not in current_user.cameras:
-        raise HTTPException(status_code=403, detail="Not subscribed to this camera")
+    _ = _get_accessible_camera(db_session, camera_id, current_user)
 
-    return user_service.get_users(db_session, camera_ids=[camera_id])
+    users: list[UserSchema] = user_service.get_users(db_session, camera_ids=[camera_id])
+    return cache_response(request, model_list_response(UserResponse, users), CachePolicy.NORMAL)
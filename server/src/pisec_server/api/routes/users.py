@@ -2,21 +2,27 @@
 
 from typing import Annotated
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, Request, Response
+from pydantic import Field
 from sqlalchemy.orm import Session
 
+from pisec_server.api.dependencies import get_pagination_params
 from pisec_server.api.models.camera_credentials import CameraCredentialResponse
 from pisec_server.api.models.camera_subscriptions import CameraSubscription
 from pisec_server.api.models.general import PaginationParams
 from pisec_server.api.models.users import UserCreate, UserResponse, UserUpdate
 from pisec_server.api.models.videos import Video
+from pisec_server.api.responses import (
+    CachePolicy,
+    cache_response,
+    model_list_response,
+    model_ndjson_response,
+    model_response,
+)
 from pisec_server.auth.dependencies import get_current_admin_user, get_current_user
 from pisec_server.core.exceptions import RecordAlreadyExistsError, RecordNotFoundError
 from pisec_server.db.database import get_db
-from pisec_server.db.db_models import Camera
 from pisec_server.db.db_models import User as UserSchema
-from pisec_server.db.db_models import Video as VideoSchema
-from pisec_server.services import camera as camera_service
 from pisec_server.services import camera_credential as credential_service
 from pisec_server.services import camera_subscription as subscription_service
 from pisec_server.services import user as user_service
@@ -25,33 +31,56 @@ from pisec_server.services import video as video_service
 router = APIRouter(prefix="/users", tags=["users"])
 
 
+def _get_authorized_user(
+    current_user: Annotated[UserSchema, Depends(get_current_user)], user_id: Annotated[int, Path(ge=1)]
+) -> UserSchema:
+    """Gets the current user, as long as they're allowed to access the given user (themselves, or anyone for admins).
+
+    Raises a 403 error before the route queries anything if they aren't.
+    """
+    if not current_user.is_admin and current_user.id != user_id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return current_user
+
+
 @router.get("/me", response_model=UserResponse)
-def get_user_me(current_user: Annotated[UserSchema, Depends(get_current_user)]) -> UserSchema:
+def get_user_me(current_user: Annotated[UserSchema, Depends(get_current_user)]) -> Response:
     """Returns the currently authenticated user."""
-    return current_user
+    return model_response(UserResponse, current_user)
 
 
 @router.get("/", response_model=list[UserResponse])
 def get_users(
+    request: Request,
     current_user: Annotated[UserSchema, Depends(get_current_admin_user)],
-    pagination: Annotated[PaginationParams, Query()],
+    pagination: Annotated[PaginationParams, Depends(get_pagination_params)],
     db_session: Annotated[Session, Depends(get_db)],
     user_ids: Annotated[list[int] | None, Query()] = None,
-) -> list[UserSchema]:
-    """Gets a list of all users with pagination. Admin only."""
-    if not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
+    stream: Annotated[bool, Query()] = False,
+) -> Response:
+    """Gets a list of all users with pagination. Admin only (enforced by the dependency).
 
-    return user_service.get_users(
-        db_session, user_ids, skip=pagination.page_index * pagination.page_size, limit=pagination.page_size
+    Set stream to receive the users as newline-delimited JSON, sent as they're read from the database.
+    """
+    fetch_users = user_service.stream_users if stream else user_service.get_users
+    users = fetch_users(
+        db_session,
+        user_ids,
+        skip=pagination.offset,
+        limit=pagination.page_size,
+        after_id=pagination.after_id,
     )
 
+    if stream:
+        return model_ndjson_response(UserResponse, users)
+    return cache_response(request, model_list_response(UserResponse, users), CachePolicy.NORMAL)
+
 
 @router.post("/", response_model=UserResponse)
 def create_user(
     user: Annotated[UserCreate, Body()],
     db_session: Annotated[Session, Depends(get_db)],
-) -> UserSchema:
+) -> Response:
     """Creates a new user with given details.
 
     The first registered user will automatically be made an admin.
@@ -61,45 +90,41 @@ def create_user(
     except RecordAlreadyExistsError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    return db_user
+    return model_response(UserResponse, db_user)
 
 
 @router.get("/{user_id}", response_model=UserResponse)
 def get_user(
-    current_user: Annotated[UserSchema, Depends(get_current_user)],
+    request: Request,
+    current_user: Annotated[UserSchema, Depends(_get_authorized_user)],
     user_id: Annotated[int, Path(ge=1)],
     db_session: Annotated[Session, Depends(get_db)],
-) -> UserSchema:
+) -> Response:
     """Returns a user's details using a given ID or email."""
-    # Only allow admins to view other users' details
-    if not current_user.is_admin and current_user.id != user_id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-
-    db_user: UserSchema | None = user_service.get_user(db_session, user_id)
+    # Users looking up themselves don't need to be fetched again
+    db_user: UserSchema | None = (
+        current_user if current_user.id == user_id else user_service.get_user_by_id(db_session, user_id)
+    )
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found!")
 
-    return db_user
+    return cache_response(request, model_response(UserResponse, db_user), CachePolicy.NORMAL)
 
 
 @router.put("/{user_id}", response_model=UserResponse)
 def update_user(
-    current_user: Annotated[UserSchema, Depends(get_current_user)],
+    current_user: Annotated[UserSchema, Depends(_get_authorized_user)],
     user_id: Annotated[int, Path(ge=1)],
     user: Annotated[UserUpdate, Body()],
     db_session: Annotated[Session, Depends(get_db)],
-) -> UserSchema:
+) -> Response:
     """Updates a user's details using a given ID or email."""
-    # Only allow admins to update other users' details
-    if not current_user.is_admin and current_user.id != user_id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-
     try:
         updated_user = user_service.update_user(db_session, user_id, user)
     except RecordNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
-    return updated_user
+    return model_response(UserResponse, updated_user)
 
 
 @router.delete("/{user_id}", response_model=UserResponse)
@@ -107,11 +132,8 @@ def delete_user(
     current_user: Annotated[UserSchema, Depends(get_current_admin_user)],
     user_id: Annotated[int, Path(ge=1)],
     db_session: Annotated[Session, Depends(get_db)],
-) -> UserSchema:
-    """Deletes a given user by ID or email. Only Admin can delete other users."""
-    if not current_user.is_admin and current_user.id != user_id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-
+) -> Response:
+    """Deletes a given user by ID. Admin only (enforced by the dependency)."""
     try:
         deleted_user: UserSchema = user_service.delete_user(db_session, user_id=user_id)
     except RecordNotFoundError as e:
@@ -119,27 +141,23 @@ def delete_user(
 
     # TODO: Revoke all tokens associated with the deleted user
 
-    return deleted_user
+    return model_response(UserResponse, deleted_user)
 
 
 @router.post("/{user_id}/subscriptions/{camera_id}", response_model=CameraSubscription)
 def create_camera_subscription(
-    current_user: Annotated[UserSchema, Depends(get_current_user)],
+    current_user: Annotated[UserSchema, Depends(_get_authorized_user)],
     user_id: Annotated[int, Path(ge=1)],
     camera_id: Annotated[int, Path(ge=1)],  # Named in singular form due to how it's queried
     db_session: Annotated[Session, Depends(get_db)],
 ) -> CameraSubscription:
     """Subscribes a given user to a given camera."""
-    # Users can only subscribe cameras to themselves, admins can do it for anyone
-    if not current_user.is_admin and current_user.id != user_id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-
-    if not user_service.get_user(db_session, user_id):
-        raise HTTPException(status_code=404, detail="User not found!")
-
-    result: list[CameraSubscription] = subscription_service.create_camera_subscriptions_by_user(
-        db_session, user_id, [camera_id]
-    )
+    try:
+        result: list[CameraSubscription] = subscription_service.create_camera_subscriptions_by_user(
+            db_session, user_id, [camera_id]
+        )
+    except RecordNotFoundError as e:
+        raise HTTPException(status_code=404, detail="User not found!") from e
     if len(result) == 0:
         raise HTTPException(status_code=404, detail="Failed to subscribe: Camera not found!")
 
@@ -148,45 +166,35 @@ def create_camera_subscription(
 
 @router.post("/{user_id}/subscriptions/", response_model=list[CameraSubscription])
 def create_camera_subscriptions(
-    current_user: Annotated[UserSchema, Depends(get_current_user)],
+    current_user: Annotated[UserSchema, Depends(_get_authorized_user)],
     user_id: Annotated[int, Path(ge=1)],
-    camera_id: Annotated[list[int], Query(ge=1)],  # Named in singular form due to how it's queried
+    camera_id: Annotated[list[Annotated[int, Field(ge=1)]], Query()],  # Named in singular form due to how it's queried
     db_session: Annotated[Session, Depends(get_db)],
 ) -> list[CameraSubscription]:
     """Subscribes a given user to given cameras."""
-    # Users can only subscribe cameras to themselves, admins can do it for anyone
-    if not current_user.is_admin and current_user.id != user_id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-
-    if not user_service.get_user(db_session, user_id):
-        raise HTTPException(status_code=404, detail="User not found!")
-
-    cameras: list[Camera] = camera_service.get_cameras(db_session, camera_ids=camera_id)
-    for camera in cameras:
-        if camera.id not in camera_id:
-            raise HTTPException(status_code=404, detail=f"Failed to apply subscriptions: Camera {camera.id} not found!")
-
-    return subscription_service.create_camera_subscriptions_by_user(db_session, user_id, camera_id)
+    # Every camera has to exist, otherwise none of them are subscribed to
+    try:
+        return subscription_service.create_camera_subscriptions_by_user(
+            db_session, user_id, camera_id, require_all_cameras=True
+        )
+    except RecordNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"Failed to apply subscriptions: {e}") from e
 
 
 @router.delete("/{user_id}/subscriptions/{camera_id}", response_model=CameraSubscription)
 def unsubscribe_from_camera(
-    current_user: Annotated[UserSchema, Depends(get_current_user)],
+    current_user: Annotated[UserSchema, Depends(_get_authorized_user)],
     user_id: Annotated[int, Path(ge=1)],
     camera_id: Annotated[int, Path(ge=1)],
     db_session: Annotated[Session, Depends(get_db)],
 ) -> CameraSubscription:
     """Unsubscribes a user from a given camera."""
-    # Users can only unsubscribe cameras from themselves, admins can do it for anyone
-    if not current_user.is_admin and current_user.id != user_id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-
-    if not user_service.get_user(db_session, user_id):
-        raise HTTPException(status_code=404, detail="User not found!")
-
-    result: list[CameraSubscription] = subscription_service.delete_camera_subscriptions_by_user(
-        db_session, user_id, [camera_id]
-    )
+    try:
+        result: list[CameraSubscription] = subscription_service.delete_camera_subscriptions_by_user(
+            db_session, user_id, [camera_id]
+        )
+    except RecordNotFoundError as e:
+        raise HTTPException(status_code=404, detail="User not found!") from e
     if len(result) == 0:
         raise HTTPException(status_code=404, detail="Failed to unsubscribe: Camera not found!")
 
@@ -195,48 +203,52 @@ def unsubscribe_from_camera(
 
 @router.delete("/{user_id}/subscriptions/", response_model=list[CameraSubscription])
 def unsubscribe_from_cameras(
-    current_user: Annotated[UserSchema, Depends(get_current_user)],
+    current_user: Annotated[UserSchema, Depends(_get_authorized_user)],
     user_id: Annotated[int, Path(ge=1)],
-    camera_id: Annotated[list[int], Query(ge=1)],  # Named in singular form due to how it's queried
+    camera_id: Annotated[list[Annotated[int, Field(ge=1)]], Query()],  # Named in singular form due to how it's queried
     db_session: Annotated[Session, Depends(get_db)],
 ) -> list[CameraSubscription]:
     """Unsubscribes a given user from given cameras."""
-    # Users can only unsubscribe cameras from themselves, admins can do it for anyone
-    if not current_user.is_admin and current_user.id != user_id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-
-    if not user_service.get_user(db_session, user_id):
-        raise HTTPException(status_code=404, detail="User not found!")
-
-    cameras: list[Camera] = camera_service.get_cameras(db_session, camera_ids=camera_id)
-    for camera in cameras:
-        if camera.id not in camera_id:
-            raise HTTPException(status_code=404, detail=f"Failed to unsubscribe: Camera {camera.id} not found!")
-
-    return subscription_service.delete_camera_subscriptions_by_user(db_session, user_id, camera_id)
+    # Every camera has to exist, otherwise none of them are unsubscribed from
+    try:
+        return subscription_service.delete_camera_subscriptions_by_user(
+            db_session, user_id, camera_id, require_all_cameras=True
+        )
+    except RecordNotFoundError as e:
+        raise HTTPException(status_code=404, detail=f"Failed to unsubscribe: {e}") from e
 
 
 @router.get("/{user_id}/videos", response_model=list[Video])
 def get_videos(
-    current_user: Annotated[UserSchema, Depends(get_current_user)],
+    request: Request,
+    current_user: Annotated[UserSchema, Depends(_get_authorized_user)],
     user_id: Annotated[int, Path(ge=1)],
-    pagination: Annotated[PaginationParams, Query()],
+    pagination: Annotated[PaginationParams, Depends(get_pagination_params)],
     db_session: Annotated[Session, Depends(get_db)],
-) -> list[VideoSchema]:
-    """Gets a list of all accessible videos with pagination."""
-    # Users can only view their own videos, admins can view anyone's videos
-    if not current_user.is_admin and current_user.id != user_id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
+    stream: Annotated[bool, Query()] = False,
+) -> Response:
+    """Gets a list of all accessible videos with pagination.
 
-    db_user: UserSchema | None = user_service.get_user(db_session, user_id)
-    if not db_user:
+    Set stream to receive the videos as newline-delimited JSON, sent as they're read from the database.
+    """
+    # The current user obviously exists, so only other users need to be looked up
+    if current_user.id != user_id and not user_service.user_exists(db_session, user_id):
         raise HTTPException(status_code=404, detail="User not found!")
 
-    camera_ids: list[int] = [camera.id for camera in db_user.cameras]
-    return video_service.get_video_entries(
-        db_session, camera_ids=camera_ids, skip=pagination.page_index * pagination.page_size, limit=pagination.page_size
+    # Filter by the user's subscriptions in the same query, rather than loading their cameras first
+    fetch_videos = video_service.stream_video_entries if stream else video_service.get_video_entries
+    videos = fetch_videos(
+        db_session,
+        skip=pagination.offset,
+        limit=pagination.page_size,
+        subscribed_user_id=user_id,
+        after_id=pagination.after_id,
     )
 
+    if stream:
+        return model_ndjson_response(Video, videos)
+    return cache_response(request, model_list_response(Video, videos), CachePolicy.SHORT)
+
 
 @router.post("/{user_id}/credential", response_model=CameraCredentialResponse)
 def create_credential(
@@ -244,9 +256,7 @@ def create_credential(
     db_session: Annotated[Session, Depends(get_db)],
 ) -> CameraCredentialResponse:
     """Creates a new credential for a given user."""
-    if not user_service.get_user(db_session, current_user.id):
-        raise HTTPException(status_code=404, detail="User not found!")
-
+    # The current user was already loaded by the auth dependency, so it doesn't need to be looked up again
     new_credential = credential_service.generate_credential(current_user)
     try:
         result = credential_service.create_credential(db_session, current_user.id, new_credential)
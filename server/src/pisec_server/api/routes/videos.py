@@ -1,41 +1,60 @@
 """FastAPI routes related to the Video table."""
 
 import mimetypes
+import os
+from contextlib import suppress
 from pathlib import Path as FilePath
 from typing import Annotated
+from uuid import uuid4
 
 import aiofiles
-from fastapi import APIRouter, Body, Depends, File, Form, HTTPException, Path, Query, UploadFile
+import aiofiles.os
+import anyio
+from fastapi import APIRouter, Body, Depends, File, Form, HTTPException, Path, Query, Request, Response, UploadFile
 from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
+from pydantic import Field
 from sqlalchemy.orm import Session
 
+from pisec_server.api.dependencies import get_pagination_params
 from pisec_server.api.models.general import PaginationParams
 from pisec_server.api.models.videos import Video, VideoUpdate
+from pisec_server.api.responses import CachePolicy, cache_response, model_list_response, model_response
 from pisec_server.auth.dependencies import get_current_credential, get_current_user
-from pisec_server.core.exceptions import InvalidFileNameError, RecordNotFoundError
+from pisec_server.core.exceptions import (
+    InvalidFileNameError,
+    RecordAccessDeniedError,
+    RecordAlreadyExistsError,
+    RecordNotFoundError,
+)
 from pisec_server.core.validation.regex import file_name_regex
 from pisec_server.core.validation.video_validation import get_video_file_path_safe
 from pisec_server.db.database import get_db
-from pisec_server.db.db_models import Camera
 from pisec_server.db.db_models import CameraCredential as CameraCredentialSchema
 from pisec_server.db.db_models import User as UserSchema
 from pisec_server.db.db_models import Video as VideoSchema
-from pisec_server.services import camera as camera_service
 from pisec_server.services import video as video_service
 
 router = APIRouter(prefix="/videos", tags=["videos"])
 
+# Size of the chunks uploaded videos are copied to storage in, so memory use doesn't grow with the video's size
+UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 1 MiB
+
 
 @router.get("/", response_model=list[Video])
 def get_videos(
+    request: Request,
     current_user: Annotated[UserSchema, Depends(get_current_user)],
-    pagination: Annotated[PaginationParams, Query()],
+    pagination: Annotated[PaginationParams, Depends(get_pagination_params)],
     db_session: Annotated[Session, Depends(get_db)],
-    video_ids: Annotated[list[int] | None, Query(ge=1)] = None,  # Named in singular form due to how it's queried
-    file_name: Annotated[str | None, Query(regex=file_name_regex, min_length=5)] = None,
-    camera_id: Annotated[list[int] | None, Query(ge=1)] = None,  # Named in singular form due to how it's queried
-) -> list[VideoSchema]:
+    video_ids: Annotated[
+        list[Annotated[int, Field(ge=1)]] | None, Query()
+    ] = None,  # Named in singular form due to how it's queried
+    file_name: Annotated[str | None, Query(pattern=file_name_regex, min_length=5)] = None,
+    camera_id: Annotated[
+        list[Annotated[int, Field(ge=1)]] | None, Query()
+    ] = None,  # Named in singular form due to how it's queried
+) -> Response:
     """Gets a list of all videos with pagination.
 
     Non-admin users can only see videos from cameras they are subscribed to.
@@ -45,16 +64,56 @@ def get_videos(
         video_ids,
         file_name,
         camera_id,
-        skip=pagination.page_index * pagination.page_size,
+        skip=pagination.offset,
         limit=pagination.page_size,
+        after_id=pagination.after_id,
+        # Non-admins only see videos from cameras they're subscribed to (filtered before paginating)
+        subscribed_user_id=None if current_user.is_admin else current_user.id,
     )
 
-    if not current_user.is_admin:
-        # Filter to only show videos from cameras user is subscribed to
-        subscribed_camera_ids = {camera.id for camera in current_user.cameras}
-        videos = [video for video in videos if video.camera_id in subscribed_camera_ids]
+    return cache_response(request, model_list_response(Video, videos), CachePolicy.SHORT)
+
+
+# Camera video directories this process has already created, so the filesystem is only touched the first time
+_created_video_dirs: set[FilePath] = set()
+
 
-    return videos
+async def _ensure_video_dir(video_dir: FilePath, recreate: bool = False) -> None:
+    """Creates a camera's video directory (without blocking the event loop) if this process hasn't already.
+
+    Set recreate if the directory went missing (e.g. it was removed while the server was running), see upload_video.
+    """
+    if video_dir in _created_video_dirs and not recreate:
+        return
+    await aiofiles.os.makedirs(video_dir, exist_ok=True)
+    _created_video_dirs.add(video_dir)
+
+
+def _evict_from_page_cache(fd: int) -> None:
+    """Writes a file's data to disk and drops it from the page cache (where supported, e.g. Linux).
+
+    Uploaded videos aren't read back soon, so this leaves the Pi's limited memory to the processes that need it rather
+    than caching every upload.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    os.fdatasync(fd)  # Only clean pages can be dropped
+    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+async def _write_video_file(video_file: UploadFile, file_path: FilePath) -> None:
+    """Writes an uploaded video to the server's storage, one chunk at a time."""
+    async with aiofiles.open(file_path, "wb") as file:
+        while chunk := await video_file.read(UPLOAD_CHUNK_SIZE):
+            _ = await file.write(chunk)
+        await file.flush()
+        await run_in_threadpool(_evict_from_page_cache, file.fileno())
+
+
+async def _remove_video_file(file_path: FilePath) -> None:
+    """Removes a video file (if it exists) without blocking the event loop."""
+    with suppress(FileNotFoundError):
+        await aiofiles.os.remove(file_path)
 
 
 @router.post("/", response_model=Video)
@@ -63,24 +122,14 @@ async def upload_video(
     file_name: Annotated[str, Form(pattern=file_name_regex, min_length=5)],
     video_file: Annotated[UploadFile, File()],
     db_session: Annotated[Session, Depends(get_db)],
-) -> VideoSchema:
+) -> Response:
     """Creates and uploads a new video with the given details."""
     if not current_credential.camera_id:
         raise HTTPException(status_code=403, detail="No camera registered with this credential!")
 
-    # Check if video entry already exists in the database (file name and camera ID must be the same)
-    db_videos: list[VideoSchema] = await run_in_threadpool(
-        video_service.get_video_entries,
-        db_session,
-        file_name=file_name,
-        camera_ids=[current_credential.camera_id],
-        limit=1,
-    )
-    if db_videos:
-        raise HTTPException(status_code=400, detail="Video already exists!")
-
-    # Check if the uploaded file is a video
-    if video_file.content_type is None or "video" not in video_file.content_type:
+    # Check if the uploaded file is a video (MIME types are case-insensitive, e.g. video/mp4)
+    content_type: str | None = video_file.content_type
+    if content_type is None or not content_type.lower().startswith("video/"):
         raise HTTPException(status_code=415, detail="File uploaded is not a video!")
 
     # TODO: Make the video files get stored on the database container instead of api server
@@ -88,35 +137,55 @@ async def upload_video(
         file_path: FilePath = get_video_file_path_safe(file_name, current_credential.camera_id)
     except InvalidFileNameError as e:
         raise HTTPException(status_code=400, detail="Invalid file name!") from e
-    # Make sure the directory exists
-    file_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # Write the uploaded video to the server's storage (async part)
+    # Write the uploaded video to a temporary file (async part). It's only moved into place once its entry is created,
+    # so the stored video is never partially written and a failed upload leaves no entry behind
+    temp_path: FilePath = file_path.with_name(f".{file_path.name}.{uuid4().hex}.part")
     try:
-        video_contents: bytes = await video_file.read()
-        async with aiofiles.open(file_path, "wb") as file:
-            _ = await file.write(video_contents)
-    except Exception as e:
+        # Make sure the directory exists
+        await _ensure_video_dir(file_path.parent)
+        try:
+            await _write_video_file(video_file, temp_path)
+        except FileNotFoundError:
+            # The directory was removed while the server was running, so create it again and retry once
+            await _ensure_video_dir(file_path.parent, recreate=True)
+            await video_file.seek(0)
+            await _write_video_file(video_file, temp_path)
+    except BaseException as e:
+        # Shielded so the partially written file is still removed if the request was cancelled
+        with anyio.CancelScope(shield=True):
+            await _remove_video_file(temp_path)
+        if not isinstance(e, Exception):
+            raise
         raise HTTPException(status_code=500, detail=f"Failed to upload video file: {str(e)}")
 
-    # Create the video entry
+    # The entry is only created if the camera exists and doesn't already have this video (file name and camera ID must
+    # be the same), even when the same video is uploaded twice at once
     try:
         result_video: VideoSchema = await run_in_threadpool(
-            video_service.create_video_entry,
-            db_session,
-            file_name,
-            current_credential.camera_id,
+            video_service.create_video_entry, db_session, file_name, current_credential.camera_id
         )
-    except RecordNotFoundError as e:
-        # Make sure the file is deleted if any unexpected error occurred
-        file_path.unlink(missing_ok=True)
-        raise HTTPException(status_code=404, detail="Camera not found!") from e
-    except Exception:
-        # Make sure the file is deleted if any unexpected error occurred
-        file_path.unlink(missing_ok=True)
+    except BaseException as e:
+        with anyio.CancelScope(shield=True):
+            await _remove_video_file(temp_path)
+        if isinstance(e, RecordNotFoundError):
+            raise HTTPException(status_code=404, detail="Camera not found!") from e
+        if isinstance(e, RecordAlreadyExistsError):
+            raise HTTPException(status_code=400, detail="Video already exists!") from e
         raise
 
-    return result_video
+    try:
+        await aiofiles.os.replace(temp_path, file_path)
+    except BaseException as e:
+        # Make sure the entry and the temporary file are deleted so the upload can be retried
+        with anyio.CancelScope(shield=True):
+            await _remove_video_file(temp_path)
+            _ = await run_in_threadpool(video_service.delete_video_entry, db_session, result_video.id)
+        if not isinstance(e, Exception):
+            raise
+        raise HTTPException(status_code=500, detail=f"Failed to upload video file: {str(e)}")
+
+    return model_response(Video, result_video)
 
 
 @router.get("/{video_id}/file")
@@ -131,7 +200,8 @@ async def download_video(
         raise HTTPException(status_code=404, detail="Video not found!")
 
     # Only allow access if the user is subscribed to the camera or is an admin
-    if not current_user.is_admin and current_user not in db_video.camera.users:
+    # The user's cameras are loaded with them, so this doesn't query the database
+    if not current_user.is_admin and db_video.camera_id not in current_user.subscribed_camera_ids:
         raise HTTPException(status_code=403, detail="Not subscribed to this camera")
 
     # Get video file path and validate it
@@ -151,10 +221,11 @@ async def download_video(
 
 @router.get("/{video_id}", response_model=Video)
 def get_video(
+    request: Request,
     current_user: Annotated[UserSchema, Depends(get_current_user)],
     video_id: Annotated[int, Path(ge=1)],
     db_session: Annotated[Session, Depends(get_db)],
-) -> VideoSchema:
+) -> Response:
     """Returns a video's details using a given ID.
 
     Users can only see videos from cameras they are subscribed to, or admins can see all.
@@ -164,11 +235,10 @@ def get_video(
         raise HTTPException(status_code=404, detail="Video not found!")
 
     # Only allow access if the user is subscribed to the camera or is an admin
-    db_camera: Camera | None = camera_service.get_camera(db_session, db_video.camera_id)
-    if db_camera and not current_user.is_admin and db_camera not in current_user.cameras:
+    if not current_user.is_admin and db_video.camera_id not in current_user.subscribed_camera_ids:
         raise HTTPException(status_code=403, detail="Not subscribed to this camera")
 
-    return db_video
+    return cache_response(request, model_response(Video, db_video), CachePolicy.LONG)
 
 
 @router.put("/{video_id}", response_model=Video)
@@ -177,26 +247,27 @@ def update_video(
     video_id: Annotated[int, Path(ge=1)],
     video: Annotated[VideoUpdate, Body()],
     db_session: Annotated[Session, Depends(get_db)],
-) -> VideoSchema:
+) -> Response:
     """Updates a video's details using a given ID.
 
     Users can only update videos from cameras they are subscribed to, or admins can update all.
     """
-    db_video: VideoSchema | None = video_service.get_video_entry(db_session, video_id)
-    if not db_video:
-        raise HTTPException(status_code=404, detail="Video not found!")
-
-    # Only allow updates if the user is subscribed to the camera or is an admin
-    db_camera: Camera | None = camera_service.get_camera(db_session, db_video.camera_id)
-    if db_camera and not current_user.is_admin and db_camera not in current_user.cameras:
-        raise HTTPException(status_code=403, detail="Not subscribed to this camera")
-
+    # Only allow updates if the user is subscribed to the camera or is an admin (checked by the update itself)
     try:
-        db_video = video_service.update_video_entry(db_session, video_id, video)
+        db_video: VideoSchema = video_service.update_video_entry(
+            db_session,
+            video_id,
+            video,
+            allowed_camera_ids=None if current_user.is_admin else current_user.subscribed_camera_ids,
+        )
     except RecordNotFoundError as e:
         raise HTTPException(status_code=404, detail="Video not found!") from e
+    except RecordAccessDeniedError as e:
+        raise HTTPException(status_code=403, detail="Not subscribed to this camera") from e
+    except RecordAlreadyExistsError as e:
+        raise HTTPException(status_code=400, detail="Video already exists!") from e
 
-    return db_video
+    return model_response(Video, db_video)
 
 
 @router.delete("/{video_id}", response_model=Video)
@@ -204,7 +275,7 @@ def delete_video(
     current_user: Annotated[UserSchema, Depends(get_current_user)],
     video_id: Annotated[int, Path(ge=1)],
     db_session: Annotated[Session, Depends(get_db)],
-) -> VideoSchema:
+) -> Response:
     """Deletes a given video.
 
     Users can only delete videos from cameras they are subscribed to, or admins can delete all.
@@ -214,8 +285,7 @@ def delete_video(
         raise HTTPException(status_code=404, detail="Video not found!")
 
     # Only allow deletion if the user is subscribed to the camera or is an admin
-    db_camera: Camera | None = camera_service.get_camera(db_session, db_video.camera_id)
-    if db_camera and not current_user.is_admin and db_camera not in current_user.cameras:
+    if not current_user.is_admin and db_video.camera_id not in current_user.subscribed_camera_ids:
         raise HTTPException(status_code=403, detail="Not subscribed to this camera")
 
     # Delete the video entry
@@ -235,4 +305,4 @@ def delete_video(
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail="Failed to delete: Video not found!") from e
 
-    return deleted_video
+    return model_response(Video, deleted_video)
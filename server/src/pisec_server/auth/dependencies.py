@@ -1,6 +1,5 @@
 """Module containing functions and dependencies for authentication and authorization."""
 
-from datetime import datetime, timezone
 from typing import Annotated
 
 from fastapi import Depends, status
@@ -8,12 +7,13 @@ from fastapi.exceptions import HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
+from pisec_server.auth.exceptions import TokenDecodingError
 from pisec_server.auth.models import TokenPayload, TokenSubjectType
 from pisec_server.auth.services import decode_access_token
 from pisec_server.db.database import get_db
 from pisec_server.db.db_models import CameraCredential, User
 from pisec_server.services.camera_credential import get_credential
-from pisec_server.services.user import get_user
+from pisec_server.services.user import get_user_with_cameras
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v0/auth/token")
 
@@ -22,10 +22,11 @@ def get_current_user(
     db_session: Annotated[Session, Depends(get_db)], token: Annotated[str, Depends(oauth2_scheme)]
 ) -> User:
     """Dependency to get the current authenticated user."""
-    payload: TokenPayload = decode_access_token(token)
-    # Shouldn't need to check expiry due to ExpiredSignatureError, but kept just in case
-    if payload.exp < datetime.now(timezone.utc):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Expired token")
+    # Expiry is already enforced when decoding the token
+    try:
+        payload: TokenPayload = decode_access_token(token)
+    except TokenDecodingError as e:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token") from e
 
     # Check if the token is for a regular user
     if payload.sub_type != TokenSubjectType.USER:
@@ -36,14 +37,17 @@ def get_current_user(
     except ValueError:
         raise ValueError("Token subject isn't valid!")
 
-    user: User | None = get_user(db_session, user_id)
+    user: User | None = get_user_with_cameras(db_session, user_id)
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
     return user
 
 
 def get_current_admin_user(current_user: Annotated[User, Depends(get_current_user)]) -> User:
-    """Dependency to get the current authenticated admin user."""
+    """Dependency to get the current authenticated admin user.
+
+    Depends on get_current_user, so FastAPI only loads the user once per request even if a route depends on both.
+    """
     if not current_user.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
     return current_user
@@ -53,11 +57,11 @@ def get_current_credential(
     db_session: Annotated[Session, Depends(get_db)], token: Annotated[str, Depends(oauth2_scheme)]
 ) -> CameraCredential:
     """Dependency to get the current authenticated camera user."""
-    payload: TokenPayload = decode_access_token(token)
-
-    # Shouldn't need to check expiry due to ExpiredSignatureError, but kept just in case
-    if payload.exp < datetime.now(timezone.utc):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Expired token")
+    # Expiry is already enforced when decoding the token
+    try:
+        payload: TokenPayload = decode_access_token(token)
+    except TokenDecodingError as e:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token") from e
 
     # Check if the token is for a camera
     if payload.sub_type != TokenSubjectType.CAMERA:
@@ -3,7 +3,7 @@
 import enum
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class TokenSubjectType(str, enum.Enum):
@@ -40,3 +40,5 @@ class TokenPayload(TokenPayloadCreate):
 
     exp: datetime  # Expiration date + time
     iat: datetime  # Date + time the token was issued at
+
+    model_config = ConfigDict(frozen=True)  # Decoded payloads are cached and shared between requests
@@ -4,8 +4,9 @@ from datetime import datetime, timedelta, timezone
 from typing import Annotated
 
 from argon2 import PasswordHasher
-from fastapi import APIRouter, Depends, Form, HTTPException, status
+from fastapi import APIRouter, Depends, Form, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
+from pydantic_core import to_json
 from sqlalchemy.orm import Session
 
 from pisec_server.auth.dependencies import (
@@ -20,25 +21,34 @@ from pisec_server.auth.services import (
     get_refresh_token,
     revoke_all_user_refresh_tokens,
     revoke_refresh_token,
+    rotate_refresh_token,
 )
 from pisec_server.core.config import settings
 from pisec_server.core.security.hashing import verify_password
 from pisec_server.db.database import get_db
 from pisec_server.db.db_models import User
 from pisec_server.services.camera_credential import get_credential
-from pisec_server.services.user import get_user_by_email, get_user_by_id  # Import get_user_by_id
+from pisec_server.services.user import get_user_by_email, user_exists
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+# Shared hasher so only the (deliberately expensive) verify step runs per request
+_password_hasher = PasswordHasher()
+
+
+def _token_response(access_token: str, refresh_token: str | None = None) -> Response:
+    """Serializes the issued tokens straight to a JSON response, skipping validation and jsonable_encoder."""
+    token = Token.model_construct(access_token=access_token, refresh_token=refresh_token, token_type="bearer")
+    return Response(content=to_json(token), media_type="application/json")
+
 
 @router.post("/token", response_model=Token)
 def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db_session: Annotated[Session, Depends(get_db)]
-) -> Token:
+) -> Response:
     """Authenticates a user and returns an access token and a refresh token."""
     user = get_user_by_email(db_session, form_data.username)
-    ph = PasswordHasher()
-    if not user or not verify_password(form_data.password, user.password_hash, ph):
+    if not user or not verify_password(form_data.password, user.password_hash, _password_hasher):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -54,43 +64,44 @@ def login_for_access_token(
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
     refresh_token = create_refresh_token(db_session, user.id)
 
-    return Token(access_token=access_token, refresh_token=refresh_token.token, token_type="bearer")
+    return _token_response(access_token, refresh_token.token)
 
 
 @router.post("/refresh", response_model=Token)
 def refresh_access_token(
     refresh_token_str: Annotated[str, Form(alias="refresh_token")], db_session: Annotated[Session, Depends(get_db)]
-) -> Token:
+) -> Response:
     """Refreshes an access token using a valid refresh token."""
     refresh_token_db = get_refresh_token(db_session, refresh_token_str)
 
-    if not refresh_token_db or refresh_token_db.expires_at < datetime.now(timezone.utc):
+    # Datetimes are stored in UTC but the database doesn't keep the timezone info
+    if not refresh_token_db or refresh_token_db.expires_at.replace(tzinfo=timezone.utc) < datetime.now(timezone.utc):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired refresh token")
 
-    user = get_user_by_id(db_session, refresh_token_db.user_id)  # Use get_user_by_id here
-    if not user:
+    # Only the user's ID is needed, so check they exist without loading them
+    user_id: int = refresh_token_db.user_id
+    if not user_exists(db_session, user_id):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
-    # Create a new refresh token and revoke the old one for rotation
-    new_refresh_token = create_refresh_token(db_session, user.id, refresh_token_db.expires_at)
-    _ = revoke_refresh_token(db_session, refresh_token_db)
+    # Create a new refresh token and revoke the old one for rotation (in one transaction)
+    new_refresh_token = rotate_refresh_token(db_session, refresh_token_db)
 
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     try:
         new_access_token = create_access_token(
-            TokenPayloadCreate(sub=str(user.id), sub_type=TokenSubjectType.USER), expires_delta=access_token_expires
+            TokenPayloadCreate(sub=str(user_id), sub_type=TokenSubjectType.USER), expires_delta=access_token_expires
         )
     except TokenEncodingError as e:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
 
-    return Token(access_token=new_access_token, refresh_token=new_refresh_token.token, token_type="bearer")
+    return _token_response(new_access_token, new_refresh_token.token)
 
 
 @router.post("/pat", response_model=Token)
 def generate_personal_access_token(
     current_user: Annotated[User, Depends(get_current_user)],
     expires_in_minutes: Annotated[int | None, Form()] = None,
-) -> Token:
+) -> Response:
     """Generates a long-lived personal access token (PAT) that could be used in CLI or for automation purposes.
 
     Set expires_in_minutes to 0 for a permanent token (warning should exist on frontend).
@@ -111,7 +122,7 @@ def generate_personal_access_token(
         pat_token = create_personal_access_token(current_user.id, TokenSubjectType.USER, expires_delta)
     except TokenEncodingError as e:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
-    return Token(access_token=pat_token, token_type="bearer")
+    return _token_response(pat_token)
 
 
 @router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
@@ -149,14 +160,15 @@ def login_for_camera_token(
     client_id: Annotated[str, Form()],
     client_secret: Annotated[str, Form()],
     db_session: Annotated[Session, Depends(get_db)],
-) -> Token:
+) -> Response:
     """Authenticates a camera and returns an access token."""
     if grant_type != "client_credentials":
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="unsupported_grant_type")
 
     camera_credential = get_credential(db_session, client_id)
-    ph = PasswordHasher()
-    if not camera_credential or not verify_password(client_secret, camera_credential.client_secret_hash, ph):
+    if not camera_credential or not verify_password(
+        client_secret, camera_credential.client_secret_hash, _password_hasher
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid client credentials",
@@ -172,4 +184,4 @@ def login_for_camera_token(
     except TokenEncodingError as e:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
 
-    return Token(access_token=access_token, token_type="bearer")
+    return _token_response(access_token)
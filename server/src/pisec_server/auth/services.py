@@ -1,8 +1,10 @@
 """Module containing CRUD functions related to authentication and token management."""
 
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 
-from jose.exceptions import ExpiredSignatureError, JWTClaimsError, JWTError
+from jwt.exceptions import InvalidTokenError, PyJWTError
+from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
 
 from pisec_server.auth.exceptions import TokenDecodingError, TokenEncodingError
@@ -10,38 +12,55 @@ from pisec_server.auth.models import TokenHeader, TokenPayload, TokenPayloadCrea
 from pisec_server.auth.utils import decode_token, encode_token
 from pisec_server.core.config import settings
 from pisec_server.db.db_models import RefreshToken
+from pisec_server.services.utils import add_and_commit
 
 
-def create_refresh_token(db: Session, user_id: int, expires_at: datetime | None = None) -> RefreshToken:
-    """Creates and stores a new refresh token for a user.
+def _build_refresh_token(user_id: int, expires_at: datetime | None = None) -> RefreshToken:
+    """Builds a new refresh token record for a user without adding it to the database.
 
-    The expiry datetime can be defined in advance to allow rotation of refresh tokens.
     This should only be used for normal users and not for a camera user.
     """
+    issued_at = datetime.now(timezone.utc)
     # Allows rotation of refresh tokens (better security)
     if expires_at is None:
-        expires_at = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        expires_at = issued_at + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
 
     # Generate a random string for the refresh token, or a JWT for specific needs
     # For simplicity, let's generate a JWT for the refresh token as well
     # NOTE: This assumes that the user is a normal user
-    issued_at = datetime.now(timezone.utc)
     refresh_token = encode_token(
         TokenHeader(alg=settings.JWT_ALGORITHM),
-        TokenPayload(sub=str(user_id), sub_type=TokenSubjectType.USER, exp=expires_at, iat=issued_at),
+        TokenPayload.model_construct(sub=str(user_id), sub_type=TokenSubjectType.USER, exp=expires_at, iat=issued_at),
         secret=settings.SECRET_KEY,
     )
 
-    db_refresh_token = RefreshToken(token=refresh_token, user_id=user_id, expires_at=expires_at, issued_at=issued_at)
-    db.add(db_refresh_token)
-    db.commit()
-    db.refresh(db_refresh_token)
-    return db_refresh_token
+    return RefreshToken(token=refresh_token, user_id=user_id, expires_at=expires_at, issued_at=issued_at)
+
+
+def create_refresh_token(db: Session, user_id: int, expires_at: datetime | None = None) -> RefreshToken:
+    """Creates and stores a new refresh token for a user.
+
+    The expiry datetime can be defined in advance to allow rotation of refresh tokens.
+    This should only be used for normal users and not for a camera user.
+    """
+    return add_and_commit(db, _build_refresh_token(user_id, expires_at))
+
+
+def rotate_refresh_token(db: Session, refresh_token: RefreshToken) -> RefreshToken:
+    """Replaces a refresh token with a new one that keeps the same expiry.
+
+    Both the revocation and the creation are committed in a single transaction.
+    """
+    new_refresh_token = _build_refresh_token(refresh_token.user_id, refresh_token.expires_at)
+    # Flush the deletion first, as a token re-issued within the same second is identical to the old one
+    db.delete(refresh_token)
+    db.flush()
+    return add_and_commit(db, new_refresh_token)
 
 
 def get_refresh_token(db: Session, token: str) -> RefreshToken | None:
     """Retrieves a refresh token from the database."""
-    return db.query(RefreshToken).filter(RefreshToken.token == token).first()
+    return db.scalars(select(RefreshToken).where(RefreshToken.token == token)).first()
 
 
 def revoke_refresh_token(db: Session, refresh_token: RefreshToken) -> RefreshToken:
@@ -51,13 +70,15 @@ def revoke_refresh_token(db: Session, refresh_token: RefreshToken) -> RefreshTok
     return refresh_token
 
 
-def revoke_all_user_refresh_tokens(db: Session, user_id: int) -> list[RefreshToken]:
-    """Revokes all refresh tokens for a given user."""
-    refresh_tokens = db.query(RefreshToken).filter(RefreshToken.user_id == user_id).all()
-    for token in refresh_tokens:
-        db.delete(token)
+def revoke_all_user_refresh_tokens(db: Session, user_id: int) -> int:
+    """Revokes all refresh tokens for a given user using a single bulk delete.
+
+    Returns the number of revoked tokens.
+    """
+    revoked_ids = db.scalars(delete(RefreshToken).where(RefreshToken.user_id == user_id).returning(RefreshToken.id))
+    revoked_count = len(revoked_ids.all())
     db.commit()
-    return refresh_tokens
+    return revoked_count
 
 
 def create_personal_access_token(
@@ -74,20 +95,36 @@ def create_personal_access_token(
 
 def create_access_token(payload: TokenPayloadCreate, expires_delta: timedelta | None = None) -> str:
     """Creates a new JWT access token."""
+    now = datetime.now(timezone.utc)
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode = TokenPayload(sub=payload.sub, sub_type=payload.sub_type, exp=expire, iat=datetime.now(timezone.utc))
+        expire = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    # All fields are already the right types, so validation can be skipped
+    to_encode = TokenPayload.model_construct(sub=payload.sub, sub_type=payload.sub_type, exp=expire, iat=now)
     try:
         return encode_token(TokenHeader(alg=settings.JWT_ALGORITHM), to_encode)
-    except JWTError as e:
+    except PyJWTError as e:
         raise TokenEncodingError("Could not create access token") from e
 
 
+@lru_cache(maxsize=4096)
+def _decode_access_token_cached(token: str) -> TokenPayload:
+    """Decodes a JWT access token, caching the payload so repeat requests skip signature verification.
+
+    Failed decodes raise and are therefore never cached.
+    """
+    return decode_token(token)
+
+
 def decode_access_token(token: str) -> TokenPayload:
     """Decodes a JWT access token and returns its payload."""
     try:
-        return decode_token(token)
-    except (JWTError, ExpiredSignatureError, JWTClaimsError) as e:
+        payload: TokenPayload = _decode_access_token_cached(token)
+    except InvalidTokenError as e:
         raise TokenDecodingError("Could not validate credentials") from e
+
+    # Cached payloads bypass the library's expiry check, so it has to be repeated here
+    if payload.exp < datetime.now(timezone.utc):
+        raise TokenDecodingError("Could not validate credentials")
+    return payload
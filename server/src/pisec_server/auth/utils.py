@@ -1,19 +1,38 @@
 """Functions related to handling jwts."""
 
-from jose import jwt
+from datetime import datetime, timezone
 
-from pisec_server.auth.models import TokenHeader, TokenPayload
+import jwt
+from jwt.exceptions import InvalidTokenError
+
+from pisec_server.auth.models import TokenHeader, TokenPayload, TokenSubjectType
 from pisec_server.core.config import settings
 
 
 def encode_token(header: TokenHeader, payload: TokenPayload, secret: str = settings.SECRET_KEY) -> str:
     """Encodes a token payload into a JWT using pydantic models."""
-    return jwt.encode(claims=payload.model_dump(), key=secret, algorithm=header.alg, headers=header.model_dump())
+    return jwt.encode(payload=payload.model_dump(), key=secret, algorithm=header.alg, headers=header.model_dump())
 
 
 def decode_token(
     token: str, secret: str = settings.SECRET_KEY, algorithm: str = settings.JWT_ALGORITHM
 ) -> TokenPayload:
-    """Decodes a jwt to a pydantic model of a token payload."""
-    payload = jwt.decode(token, secret, algorithms=[algorithm])
-    return TokenPayload(sub=payload["sub"], sub_type=payload["sub_type"], exp=payload["exp"], iat=payload["iat"])  # pyright: ignore[reportAny]
+    """Decodes a jwt to a pydantic model of a token payload.
+
+    The claims' types are already checked by PyJWT, so the model is built without running pydantic validation.
+
+    Raises:
+        InvalidTokenError: If the token is invalid, expired or has an unknown subject type.
+    """
+    payload = jwt.decode(token, secret, algorithms=[algorithm], options={"require": ["exp", "iat", "sub", "sub_type"]})
+    try:
+        sub_type = TokenSubjectType(payload["sub_type"])
+    except ValueError as e:
+        raise InvalidTokenError("Invalid token subject type") from e
+
+    return TokenPayload.model_construct(
+        sub=payload["sub"],
+        sub_type=sub_type,
+        exp=datetime.fromtimestamp(payload["exp"], timezone.utc),  # pyright: ignore[reportAny]
+        iat=datetime.fromtimestamp(payload["iat"], timezone.utc),  # pyright: ignore[reportAny]
+    )
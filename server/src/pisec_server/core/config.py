@@ -33,28 +33,31 @@ def _get_db_type() -> DBType:
         raise ValueError(f"Invalid DB type: {db_type_env}")
 
 
+# Environment variables needed to connect to a postgres database
+_POSTGRES_ENV_VARS: tuple[str, ...] = (
+    "POSTGRES_USER",
+    "POSTGRES_PASSWORD",
+    "POSTGRES_PORT",
+    "POSTGRES_DB_NAME",
+    "POSTGRES_HOST",
+)
+
+
 def _get_db_url(db_type: DBType) -> str:
     """Gets a database URL using the data given in the environment variables."""
     match db_type:
         case DBType.SQLITE:
             return "sqlite:///app.db"
         case DBType.POSTGRES:
-            user: str | None = os.getenv("POSTGRES_USER")
-            password: str | None = os.getenv("POSTGRES_PASSWORD")
-            port: str | None = os.getenv("POSTGRES_PORT")
-            db_name: str | None = os.getenv("POSTGRES_DB_NAME")
-            host: str | None = os.getenv("POSTGRES_HOST")
-            if user is None:
-                raise ValueError("Cannot connect to a database! POSTGRES_USER is not set!")
-            if password is None:
-                raise ValueError("Cannot connect to a database! POSTGRES_PASSWORD is not set!")
-            if port is None:
-                raise ValueError("Cannot connect to a database! POSTGRES_PORT is not set!")
-            if db_name is None:
-                raise ValueError("Cannot connect to a database! POSTGRES_DB_NAME is not set!")
-            if host is None:
-                raise ValueError("Cannot connect to a database! POSTGRES_HOST is not set!")
-            return f"postgresql://{user}:{password}@{host}:{port}/{db_name}"
+            # Read every variable in one pass, then report the first one that's missing
+            env: dict[str, str | None] = {name: os.getenv(name) for name in _POSTGRES_ENV_VARS}
+            for name, value in env.items():
+                if value is None:
+                    raise ValueError(f"Cannot connect to a database! {name} is not set!")
+            return (
+                f"postgresql://{env['POSTGRES_USER']}:{env['POSTGRES_PASSWORD']}"
+                f"@{env['POSTGRES_HOST']}:{env['POSTGRES_PORT']}/{env['POSTGRES_DB_NAME']}"
+            )
 
 
 def _get_secret() -> str:
@@ -79,6 +82,23 @@ def _get_jwt_algorithm() -> JWTAlgorithm:
     return JWTAlgorithm(algorithm)
 
 
+def _get_positive_int(name: str, default: int) -> int:
+    """Loads a positive integer from environment variables.
+
+    Returns the default if the environment variable is not set. Raises ValueError if it isn't a positive integer.
+    """
+    value: str | None = os.getenv(name)
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer!") from None
+    if number < 1:
+        raise ValueError(f"{name} must be at least 1!")
+    return number
+
+
 def _get_video_dir() -> Path:
     """Loads video directory from environment variables.
 
@@ -108,6 +128,15 @@ class Settings:
     REFRESH_TOKEN_EXPIRE_DAYS: int = 30
     CAMERA_TOKEN_EXPIRE_HOURS: int = 12
 
+    # Number of threads each worker process runs sync routes (and their database queries) in
+    # The database connection pools are sized to match, so a running route never waits for a connection
+    WORKER_THREADS: int = _get_positive_int("WORKER_THREADS", 40)
+
+    # Number of worker processes serving requests (uvicorn's own variable, set by `pisec-server serve`)
+    WORKERS: int = _get_positive_int("WEB_CONCURRENCY", 1)
+    # Total number of postgres connections shared by all worker processes (kept below postgres' default limit of 100)
+    DB_MAX_CONNECTIONS: int = _get_positive_int("DB_MAX_CONNECTIONS", 80)
+
     # Admin bootstrapping
     # The first registered user will automatically become an admin if this is enabled
     ENABLE_FIRST_USER_ADMIN: bool = os.getenv("ENABLE_FIRST_USER_ADMIN", "true").lower() == "true"
@@ -7,6 +7,12 @@ class RecordNotFoundError(Exception):
     pass
 
 
+class RecordAccessDeniedError(Exception):
+    """Exception raised when a record exists but the user isn't allowed to access it."""
+
+    pass
+
+
 class RecordAlreadyExistsError(Exception):
     """Exception raised when a record already exists."""
 
@@ -23,3 +29,9 @@ class InvalidFileNameError(Exception):
     """Exception raised when a file name is not valid."""
 
     pass
+
+
+class RecordInUseError(Exception):
+    """Exception raised when a record can't be deleted because other records still depend on it."""
+
+    pass
@@ -1,9 +1,9 @@
 """Collection of regex rules used for validation."""
 
+import re
+
 # As long as the name starts with a letter (case-insensitive)
 camera_name_regex: str = r"^[a-zA-Z]+.*$"
-# Regex pattern for the ipv4 format
-ipv4_regex: str = r"^((25[0-5]|(2[0-4]|1\d|[1-9]|)\d)\.?\b){4}$"
 # Regex pattern for the MAC address format
 mac_address_regex: str = r"^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$"
 
@@ -12,3 +12,7 @@ email_regex: str = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-z]{2,}$"
 
 # Any name excluding '/' characters
 file_name_regex: str = r"video-\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}\.mp4"
+
+# Precompiled for validating stored video paths outside of pydantic models
+# (pydantic compiles `Field(pattern=...)` once when the model class is built)
+file_name_pattern: re.Pattern[str] = re.compile(file_name_regex)
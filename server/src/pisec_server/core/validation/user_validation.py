@@ -1,6 +1,12 @@
 """Collection of validation functions for user accounts."""
 
-import re
+import string
+
+# Character classes a password needs at least one of (same as the regex classes [A-Z], [a-z], [0-9] and [@$!%*?&])
+_uppercase_characters: frozenset[str] = frozenset(string.ascii_uppercase)
+_lowercase_characters: frozenset[str] = frozenset(string.ascii_lowercase)
+_number_characters: frozenset[str] = frozenset(string.digits)
+_special_characters: frozenset[str] = frozenset("@$!%*?&")
 
 
 def password_validator(value: str) -> str:
@@ -14,12 +20,15 @@ def password_validator(value: str) -> str:
     """
     if len(value) < 8:
         raise ValueError("Password must be at least 8 characters long")
-    if not re.search("[A-Z]", value):
+
+    # Read the password once, then check each class against its (much smaller) set of distinct characters
+    characters: frozenset[str] = frozenset(value)
+    if characters.isdisjoint(_uppercase_characters):
         raise ValueError("Password must contain at least 1 uppercase letter")
-    if not re.search("[a-z]", value):
+    if characters.isdisjoint(_lowercase_characters):
         raise ValueError("Password must contain at least 1 lowercase letter")
-    if not re.search("[0-9]", value):
+    if characters.isdisjoint(_number_characters):
         raise ValueError("Password must contain at least 1 number")
-    if not re.search("[@$!%*?&]", value):
+    if characters.isdisjoint(_special_characters):
         raise ValueError("Password must contain at least 1 special character (one of these: @$!%*?&)")
     return value
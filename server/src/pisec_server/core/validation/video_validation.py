@@ -1,11 +1,10 @@
 """A set of validation functions related to videos."""
 
-import re
 from pathlib import Path
 
 from pisec_server.core.config import settings
 from pisec_server.core.exceptions import InvalidFileNameError
-from pisec_server.core.validation.regex import file_name_regex
+from pisec_server.core.validation.regex import file_name_pattern
 
 
 def get_video_file_path_safe(file_name: str, camera_id: int) -> Path:
@@ -17,7 +16,7 @@ def get_video_file_path_safe(file_name: str, camera_id: int) -> Path:
     # Technically this is overkill because a regex check is done at the pydantic
     # model level, making it impossible to inject a file path
     if (
-        not re.match(file_name_regex, file_path.name)
+        not file_name_pattern.fullmatch(file_path.name)
         or file_path.parent.name != str(camera_id)
         or file_path.parent.parent != settings.VIDEO_FILES_DIR
     ):
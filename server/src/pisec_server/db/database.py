@@ -3,11 +3,13 @@
 from collections.abc import Generator
 from typing import Any, Protocol
 
-from sqlalchemy import Engine, create_engine
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.engine.interfaces import DBAPIConnection
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import ConnectionPoolEntry
 
 from pisec_server.core.config import DBType, settings
-from pisec_server.db.db_models import Base
+from pisec_server.db.db_models import Base, video_file_name_index
 
 
 class DBConnectorProtocol(Protocol):
@@ -52,13 +54,60 @@ class GeneralDBConnector:
 
 
 def create_postgres_connector(database_url: str) -> DBConnectorProtocol:
-    """Creates a postgres database connector."""
-    return GeneralDBConnector(database_url)
+    """Creates a postgres database connector with a connection pool sized for the API's worker threads.
+
+    Sync routes run in a threadpool of WORKER_THREADS threads per worker process, so the pool can grow to that many
+    connections before requests have to wait for one. It's also capped to this process's share of DB_MAX_CONNECTIONS
+    (split evenly between the worker processes), so all the workers together stay within the server's connection limit.
+    Only up to 10 are kept open when idle.
+    """
+    max_connections: int = min(settings.WORKER_THREADS, max(1, settings.DB_MAX_CONNECTIONS // settings.WORKERS))
+    pool_size: int = min(10, max_connections)
+    return GeneralDBConnector(
+        database_url,
+        pool_size=pool_size,
+        max_overflow=max_connections - pool_size,
+        pool_pre_ping=True,  # Replace connections dropped by the database (e.g. after a restart)
+        pool_recycle=1800,  # Seconds
+        pool_use_lifo=True,  # Reuse the most recent connections so idle ones can time out
+    )
+
+
+# Applied to every new sqlite connection
+_SQLITE_PRAGMAS: tuple[str, ...] = (
+    "PRAGMA journal_mode=WAL",  # Readers don't block the writer (and vice versa)
+    "PRAGMA synchronous=NORMAL",  # Safe with WAL, only the last commits can be lost on power loss (not corrupted)
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",  # 256 MiB, read through the OS page cache (shared between connections)
+)
+
+
+def _set_sqlite_pragmas(dbapi_connection: DBAPIConnection, _connection_record: ConnectionPoolEntry) -> None:
+    """Tunes a new sqlite connection for concurrent requests."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
 
 
 def create_sqlite_connector(database_url: str) -> DBConnectorProtocol:
-    """Creates a sqlite database connector with some default arguments."""
-    return GeneralDBConnector(database_url, connect_args={"check_same_thread": False})
+    """Creates a sqlite database connector with a connection pool sized for the API's worker threads.
+
+    Connections are kept open between requests, so each keeps its page cache warm instead of reconnecting (and reading
+    the database file again) every time. The database is used in WAL mode, so reads can run while a video or
+    subscription is being written.
+    """
+    pool_size: int = min(5, settings.WORKER_THREADS)
+    connector = GeneralDBConnector(
+        database_url,
+        connect_args={"check_same_thread": False},
+        pool_size=pool_size,
+        max_overflow=settings.WORKER_THREADS - pool_size,
+    )
+    event.listen(connector.get_engine(), "connect", _set_sqlite_pragmas)
+    return connector
 
 
 def create_db_connector(db_type: DBType) -> DBConnectorProtocol:
@@ -70,6 +119,16 @@ def create_db_connector(db_type: DBType) -> DBConnectorProtocol:
             return create_postgres_connector(settings.DB_URL)
 
 
+def create_tables(engine: Engine) -> None:
+    """Creates any missing tables, along with the indexes added to existing tables since they were first created.
+
+    create_all doesn't alter tables that already exist, so databases created before an index was added wouldn't have it
+    (e.g. the unique index on a camera's video file names, which video uploads rely on).
+    """
+    Base.metadata.create_all(bind=engine)
+    video_file_name_index.create(bind=engine, checkfirst=True)
+
+
 def get_db() -> Generator[Session, None, None]:
     """Returns an instance of the database that you can query against."""
     session = db_connector.get_session()
@@ -84,4 +143,4 @@ def get_db() -> Generator[Session, None, None]:
 
 
 db_connector: DBConnectorProtocol = create_db_connector(settings.DB_TYPE)
-Base.metadata.create_all(bind=db_connector.get_engine())
+create_tables(db_connector.get_engine())
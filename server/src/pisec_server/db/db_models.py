@@ -3,8 +3,9 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from functools import cached_property
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import DDL, Boolean, DateTime, ForeignKey, Index, Integer, String, Text, event
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -20,7 +21,8 @@ class CameraSubscription(Base):
     __tablename__: str = "camera_subscriptions"
 
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), primary_key=True)
-    camera_id: Mapped[int] = mapped_column(Integer, ForeignKey("cameras.id"), primary_key=True)
+    # The primary key already indexes lookups by user, so camera lookups (e.g. a camera's users) get their own index
+    camera_id: Mapped[int] = mapped_column(Integer, ForeignKey("cameras.id"), primary_key=True, index=True)
     registered_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
 
 
@@ -39,6 +41,14 @@ class User(Base):
     cameras: Mapped[list[Camera]] = relationship("Camera", secondary="camera_subscriptions", back_populates="users")
     refresh_tokens: Mapped[list["RefreshToken"]] = relationship("RefreshToken", back_populates="user")
 
+    @cached_property
+    def subscribed_camera_ids(self) -> frozenset[int]:
+        """IDs of the cameras the user is subscribed to, computed once per loaded user.
+
+        Meant for access checks on the authenticated user. It isn't updated if the user's cameras change afterwards.
+        """
+        return frozenset(camera.id for camera in self.cameras)
+
 
 class Camera(Base):
     """Schema for the camera table."""
@@ -61,7 +71,7 @@ class Video(Base):
     __tablename__: str = "videos"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    camera_id: Mapped[int] = mapped_column(ForeignKey(f"{Camera.__tablename__}.id"))
+    camera_id: Mapped[int] = mapped_column(ForeignKey(f"{Camera.__tablename__}.id"), index=True)
     file_name: Mapped[str] = mapped_column(String)
     uploaded_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
 
@@ -96,3 +106,22 @@ class RefreshToken(Base):
     device_info: Mapped[str | None] = mapped_column(String, nullable=True)  # Optional device info for specific logout
 
     user: Mapped[User] = relationship("User", back_populates="refresh_tokens")
+
+
+# A camera can't have two videos with the same file name (they'd be stored at the same path)
+# Declared as a unique index rather than a constraint, so it can be added to tables created before it existed
+video_file_name_index: Index = Index("uq_videos_camera_id_file_name", Video.camera_id, Video.file_name, unique=True)
+
+# Trigram indexes (postgres only) for the columns searched with ILIKE '%...%', which a B-tree index can't be used for
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),  # type: ignore[no-untyped-call]
+)
+for _column in (Camera.name, Camera.mac_address, Video.file_name, User.email):
+    _ = Index(
+        f"ix_{_column.class_.__tablename__}_{_column.key}_trgm",
+        _column,
+        postgresql_using="gin",
+        postgresql_ops={_column.key: "gin_trgm_ops"},
+    ).ddl_if(dialect="postgresql")
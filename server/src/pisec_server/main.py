@@ -1,13 +1,20 @@
 """Pi security project main entrypoint."""
 
+import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from importlib.metadata import PackageNotFoundError, version
 
+import anyio.to_thread
+import orjson
 import typer
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 
 from pisec_server.api.routes import cameras, users, videos
 from pisec_server.auth import routes as auth
+from pisec_server.core.config import settings
 
 # get version info
 try:
@@ -17,7 +24,21 @@ except PackageNotFoundError:
     # package is not installed (e.g. in development without editable install)
     __version__ = "0.1.0"  # fallback initial version value
 
-app = FastAPI(title="Pi Security Camera", description="API for managing Pi security cameras", version=__version__)
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """Sizes the threadpool that sync routes run in before the server starts accepting requests."""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.WORKER_THREADS
+    yield
+
+
+app = FastAPI(
+    title="Pi Security Camera",
+    description="API for managing Pi security cameras",
+    version=__version__,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
 
 api_prefix: str = "/api/v0"
 app.include_router(users.router, prefix=api_prefix)
@@ -26,25 +47,60 @@ app.include_router(videos.router, prefix=api_prefix)
 app.include_router(auth.router, prefix=api_prefix)
 
 
-@app.get(api_prefix)
-def read_root() -> dict[str, str]:
+# The root and health responses never change, so they are encoded once at startup
+_root_content: bytes = orjson.dumps({"message": app.title, "description": app.description, "version": app.version})
+_health_content: bytes = orjson.dumps({"status": "ok"})
+
+
+@app.get(api_prefix, response_model=dict[str, str])
+async def read_root() -> Response:
     """Root API function."""
-    return {"message": app.title, "description": app.description, "version": app.version}
+    return Response(content=_root_content, media_type="application/json")
 
 
-@app.get(f"{api_prefix}/health")
-def check_health() -> dict[str, str]:
+@app.get(f"{api_prefix}/health", response_model=dict[str, str])
+async def check_health() -> Response:
     """Route to check health. Doesn't really do anything yet."""
-    return {"status": "ok"}
+    return Response(content=_health_content, media_type="application/json")
 
 
 cli_app = typer.Typer()
 
 
 @cli_app.command()
-def serve(host: str = "127.0.0.1", port: int = 8000, reload: bool = True) -> None:
-    """Main file entrypoint."""
-    uvicorn.run("pisec_server.main:app", host=host, port=port, reload=reload)
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    reload: bool = True,
+    workers: int | None = None,
+    access_log: bool = False,
+) -> None:
+    """Main file entrypoint.
+
+    Args:
+        host: The host address to bind the server to.
+        port: The port to bind the server to.
+        reload: Whether to reload the server when the source code changes. Only a single worker is used when enabled.
+        workers: The number of worker processes to run. Defaults to the number of CPU cores when not reloading.
+        access_log: Whether to log every request. Disabled by default as it adds overhead to every request.
+    """
+    if reload:
+        workers = 1
+    elif workers is None:
+        workers = os.cpu_count() or 1
+    # Lets each worker process size its database connection pool to its share of the connections
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+
+    uvicorn.run(
+        "pisec_server.main:app",
+        host=host,
+        port=port,
+        reload=reload,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        access_log=access_log,
+    )
 
 
 if __name__ == "__main__":
@@ -1,16 +1,69 @@
 """File containing crud functions related to the Camera table."""
 
-from sqlalchemy import select
+from collections.abc import Iterator
+
+from sqlalchemy import Select, delete, exists, select, update
 from sqlalchemy.orm import Session
 
 from pisec_server.api.models.cameras import CameraCreate, CameraUpdate
-from pisec_server.core.exceptions import RecordNotFoundError
-from pisec_server.db.db_models import Camera
+from pisec_server.core.exceptions import RecordInUseError, RecordNotFoundError
+from pisec_server.db.db_models import Camera, CameraCredential, CameraSubscription, Video
+from pisec_server.services.utils import STREAM_BATCH_SIZE, add_and_commit
 
 
 def get_camera(db: Session, camera_id: int) -> Camera | None:
     """Queries the database to get a camera using the given ID."""
-    return db.query(Camera).filter(Camera.id == camera_id).first()
+    return db.get(Camera, camera_id)
+
+
+def get_camera_with_access(db: Session, camera_id: int, user_id: int) -> tuple[Camera, bool] | None:
+    """Gets a camera using the given ID, along with whether the given user is subscribed to it.
+
+    Both are read by a single query (the subscription is checked with an EXISTS subquery). Returns None if the camera
+    doesn't exist.
+    """
+    is_subscribed = (
+        exists()
+        .where(CameraSubscription.camera_id == Camera.id, CameraSubscription.user_id == user_id)
+        .label("subscribed")
+    )
+    row = db.execute(select(Camera, is_subscribed).where(Camera.id == camera_id)).one_or_none()
+    if row is None:
+        return None
+    return row[0], bool(row[1])
+
+
+def get_existing_camera_ids(db: Session, camera_ids: list[int]) -> set[int]:
+    """Returns which of the given camera IDs exist, only selecting the IDs rather than full camera records."""
+    return set(db.scalars(select(Camera.id).where(Camera.id.in_(camera_ids))).all())
+
+
+def _select_cameras(
+    camera_ids: list[int] | None,
+    camera_name: str | None,
+    mac_address: str | None,
+    skip: int,
+    limit: int,
+    subscribed_user_id: int | None,
+    after_id: int | None,
+) -> Select[tuple[Camera]]:
+    """Builds the paginated query used by get_cameras and stream_cameras."""
+    query = select(Camera)
+
+    if subscribed_user_id is not None:
+        query = query.join(CameraSubscription, CameraSubscription.camera_id == Camera.id).where(
+            CameraSubscription.user_id == subscribed_user_id
+        )
+    if camera_ids:
+        query = query.where(Camera.id.in_(camera_ids))
+    if camera_name:
+        query = query.where(Camera.name.ilike(f"%{camera_name}%"))
+    if mac_address:
+        query = query.where(Camera.mac_address.ilike(f"%{mac_address}%"))
+    if after_id is not None:
+        query = query.where(Camera.id > after_id)
+
+    return query.order_by(Camera.id).offset(skip).limit(limit)
 
 
 def get_cameras(
@@ -20,64 +73,91 @@ def get_cameras(
     mac_address: str | None = None,
     skip: int = 0,
     limit: int = 100,
+    subscribed_user_id: int | None = None,
+    after_id: int | None = None,
 ) -> list[Camera]:
     """Queries and returns a list of cameras with pagination.
 
-    It allows filtering by likeness as well as limiting the results to specifc cameras by IDs.
+    It allows filtering by likeness as well as limiting the results to specifc cameras by IDs. If a subscribed user ID
+    is given, only cameras that user is subscribed to are returned (filtered before paginating).
+
+    Cameras are ordered by ID. Giving the ID of the last camera of the previous page as after_id skips straight to the
+    next page using the primary key index, rather than reading and discarding every skipped row like an offset does.
     """
-    query = select(Camera)
+    query = _select_cameras(camera_ids, camera_name, mac_address, skip, limit, subscribed_user_id, after_id)
+    return list(db.execute(query).scalars().all())
 
-    if camera_ids:
-        query = query.where(Camera.id.in_(camera_ids))
-    if camera_name:
-        query = query.where(Camera.name.ilike(f"%{camera_name}%"))
-    if mac_address:
-        query = query.where(Camera.mac_address.ilike(f"%{mac_address}%"))
 
-    return list(db.execute(query.offset(skip).limit(limit)).scalars().all())
+def stream_cameras(
+    db: Session,
+    camera_ids: list[int] | None = None,
+    camera_name: str | None = None,
+    mac_address: str | None = None,
+    skip: int = 0,
+    limit: int = 100,
+    subscribed_user_id: int | None = None,
+    after_id: int | None = None,
+) -> Iterator[Camera]:
+    """Same as get_cameras, but yields the cameras in batches as they're read from the database."""
+    query = _select_cameras(camera_ids, camera_name, mac_address, skip, limit, subscribed_user_id, after_id)
+    yield from db.scalars(query.execution_options(yield_per=STREAM_BATCH_SIZE))
 
 
 def create_camera(db: Session, camera: CameraCreate) -> Camera:
     """Creates a new camera using the given inputs."""
-    db_camera = Camera(name=camera.name, mac_address=camera.mac_address)
+    return add_and_commit(db, Camera(name=camera.name, mac_address=camera.mac_address))
 
-    db.add(db_camera)
-    db.commit()
-    db.refresh(db_camera)
 
-    return db_camera
+def update_camera(db: Session, camera_id: int, camera: CameraUpdate) -> Camera:
+    """Modifies a given camera's parameters (excluding ID) via a given ID.
 
+    The camera is updated and read back by a single UPDATE ... RETURNING statement.
+    """
+    # fields left as None will not be included in the dictionary (auth_key isn't stored in the cameras table)
+    camera_as_dict = camera.model_dump(exclude_unset=True, exclude={"auth_key"})
 
-def update_camera(db: Session, camera_id: int, camera: CameraUpdate) -> Camera:
-    """Modifies a given camera's parameters (excluding ID) via a given ID."""
-    db_camera = db.query(Camera).filter(Camera.id == camera_id).first()
+    # Skip modifying the database if inputs are empty
+    if not camera_as_dict:
+        db_camera = get_camera(db, camera_id)
+    else:
+        db_camera = db.scalars(
+            update(Camera).where(Camera.id == camera_id).values(**camera_as_dict).returning(Camera)
+        ).one_or_none()
 
     if not db_camera:
         raise RecordNotFoundError(f"Camera {camera_id} does not exist!")
 
-    # Skip modifying the database if inputs are empty or if camera doesn't exist
-    if not camera.model_fields_set:
-        return db_camera
-
-    # fields left as None will not be included in the dictionary
-    camera_as_dict = camera.model_dump(exclude_unset=True)
-
-    for key, value in camera_as_dict.items():  # pyright: ignore[reportAny]
-        setattr(db_camera, key, value)
+    # Detach the camera so committing doesn't expire it (which would reload it when it's read)
+    db.expunge(db_camera)
     db.commit()
-    db.refresh(db_camera)
 
     return db_camera
 
 
 def delete_camera(db: Session, camera_id: int) -> Camera:
-    """Deletes a given camera via ID."""
-    db_camera = db.query(Camera).filter(Camera.id == camera_id).first()
+    """Deletes a given camera via ID.
+
+    The camera's subscriptions are removed and its credential is unlinked first, then the camera is deleted and read
+    back by a single DELETE ... RETURNING statement. Cameras with videos aren't deleted, so their recordings are only
+    ever removed explicitly (see delete_video_entries_by_camera).
+
+    Raises:
+        RecordNotFoundError: If the camera doesn't exist.
+        RecordInUseError: If the camera still has videos.
+    """
+    _ = db.execute(delete(CameraSubscription).where(CameraSubscription.camera_id == camera_id))
+    _ = db.execute(update(CameraCredential).where(CameraCredential.camera_id == camera_id).values(camera_id=None))
+    has_videos = exists().where(Video.camera_id == Camera.id)
+    db_camera = db.scalars(delete(Camera).where(Camera.id == camera_id, ~has_videos).returning(Camera)).one_or_none()
 
     if not db_camera:
-        raise RecordNotFoundError(f"Camera {camera_id} does not exist!")
+        db.rollback()
+        if not get_camera(db, camera_id):
+            raise RecordNotFoundError(f"Camera {camera_id} does not exist!")
+        raise RecordInUseError(f"Camera {camera_id} still has videos!")
 
-    db.delete(db_camera)
+    # Detach the deleted camera so it can still be read after committing
+    db.expunge(db_camera)
     db.commit()
 
     return db_camera
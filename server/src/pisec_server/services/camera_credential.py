@@ -11,12 +11,12 @@ from pisec_server.core.exceptions import RecordAlreadyExistsError, RecordNotFoun
 from pisec_server.core.security.hashing import generate_hashed_password
 from pisec_server.db.db_models import Camera, CameraCredential, User
 from pisec_server.services.camera import get_camera
+from pisec_server.services.utils import add_and_commit
 
 
-# TODO: Use sqlalchemy select instead of query
 def get_credential(db: Session, client_id: str) -> CameraCredential | None:
     """Queries the database to get a camera credential using the given ID."""
-    return db.query(CameraCredential).filter(CameraCredential.client_id == client_id).first()
+    return db.get(CameraCredential, client_id)
 
 
 def generate_credential(user: User) -> CameraCredentialCreate:
@@ -39,11 +39,8 @@ def create_credential(db: Session, user_id: int, credential: CameraCredentialCre
         user_id=user_id,
         client_secret_hash=generate_hashed_password(credential.client_secret, PasswordHasher()),
     )
-    db.add(db_credential)
-    db.commit()
-    db.refresh(db_credential)
 
-    return db_credential
+    return add_and_commit(db, db_credential)
 
 
 def assign_camera(db: Session, client_id: str, camera_id: int) -> CameraCredential:
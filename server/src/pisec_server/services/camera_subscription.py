@@ -1,60 +1,87 @@
 """File containing crud functions related to handling camera subscriptions."""
 
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, delete, exists, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 
 from pisec_server.api.models.camera_subscriptions import CameraSubscription
+from pisec_server.core.exceptions import RecordNotFoundError
 from pisec_server.db.db_models import Camera, User
-from pisec_server.services.camera import get_camera, get_cameras
-from pisec_server.services.user import get_user, get_users
+from pisec_server.db.db_models import CameraSubscription as CameraSubscriptionSchema
+from pisec_server.services.camera import get_existing_camera_ids
+from pisec_server.services.user import get_subscribed_camera_ids, user_exists
 
 
-def get_camera_subscriptions_by_user(db: Session, user_id: int) -> list[CameraSubscription]:
-    """Gets all camera subscriptions of the given user."""
-    subscriptions: list[CameraSubscription] = list()
+def _insert_subscriptions(db: Session) -> postgresql.Insert | sqlite.Insert:
+    """Starts an INSERT into the subscriptions table that supports ON CONFLICT clauses for the session's database."""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(CameraSubscriptionSchema)
+    return sqlite.insert(CameraSubscriptionSchema)
 
-    db_user: User | None = get_user(db, user_id)
-    if not db_user:
-        return subscriptions
 
-    for camera in db_user.cameras:
-        subscriptions.append(CameraSubscription(user_id=db_user.id, camera_id=camera.id))
-
-    return subscriptions
+def get_camera_subscriptions_by_user(db: Session, user_id: int) -> list[CameraSubscription]:
+    """Gets all camera subscriptions of the given user."""
+    return [
+        CameraSubscription(user_id=user_id, camera_id=camera_id)
+        for camera_id in sorted(get_subscribed_camera_ids(db, user_id))
+    ]
 
 
 def get_camera_subscriptions_by_camera(db: Session, camera_id: int) -> list[CameraSubscription]:
-    """Returns all subscriptions a given camera is assigned to."""
-    subscriptions: list[CameraSubscription] = list()
-
-    db_camera: Camera | None = get_camera(db, camera_id)
-    if not db_camera:
-        return subscriptions
-
-    for user in db_camera.users:
-        subscriptions.append(CameraSubscription(user_id=user.id, camera_id=camera_id))
-
-    return subscriptions
-
-
-def create_camera_subscriptions_by_user(db: Session, user_id: int, camera_ids: list[int]) -> list[CameraSubscription]:
-    """Subscribes the given user to the given cameras."""
-    db_user: User | None = get_user(db, user_id)
-    # don't bother subscribing if the user doesn't exist
-    if not db_user:
+    """Returns all subscriptions a given camera is assigned to.
+
+    Only the subscribed user IDs are selected, rather than loading the camera and its users.
+    """
+    query = (
+        select(CameraSubscriptionSchema.user_id)
+        .where(CameraSubscriptionSchema.camera_id == camera_id)
+        .order_by(CameraSubscriptionSchema.user_id)
+    )
+    return [CameraSubscription(user_id=user_id, camera_id=camera_id) for user_id in db.scalars(query)]
+
+
+def create_camera_subscriptions_by_user(
+    db: Session, user_id: int, camera_ids: list[int], require_all_cameras: bool = False
+) -> list[CameraSubscription]:
+    """Subscribes the given user to the given cameras.
+
+    Cameras that the user is already subscribed to are skipped, as are cameras that don't exist (unless
+    require_all_cameras is set). All the subscriptions are added by a single INSERT ... SELECT statement, which ignores
+    the existing ones and returns the ones it created. The cameras and user are only looked up separately if fewer
+    subscriptions were added than requested.
+
+    Raises:
+        RecordNotFoundError: If the user doesn't exist, or if require_all_cameras is set and any of the cameras don't
+            exist (nothing is subscribed in either case).
+    """
+    if not camera_ids:
         return []
 
-    # separate out the cameras that the user is already subscribed to
-    current_subscriptions: list[CameraSubscription] = get_camera_subscriptions_by_user(db, user_id)
-    subscribed_camera_ids: set[int] = set([sub.camera_id for sub in current_subscriptions])
-    unsubscribed_camera_ids: set[int] = set(camera_ids) - subscribed_camera_ids
-
-    # add the new camera subscriptions
-    result: list[CameraSubscription] = list()
-    for id in unsubscribed_camera_ids:
-        camera: Camera | None = get_camera(db, id)
-        if camera:
-            db_user.cameras.append(camera)
-            result.append(CameraSubscription(user_id=db_user.id, camera_id=camera.id))
+    new_subscriptions = (
+        select(literal(user_id), Camera.id, literal(datetime.now(timezone.utc), DateTime))
+        .where(Camera.id.in_(camera_ids), exists().where(User.id == user_id))
+        .order_by(Camera.id)
+    )
+    query = (
+        _insert_subscriptions(db)
+        .from_select(["user_id", "camera_id", "registered_at"], new_subscriptions)
+        .on_conflict_do_nothing(index_elements=["user_id", "camera_id"])
+        .returning(CameraSubscriptionSchema.user_id, CameraSubscriptionSchema.camera_id)
+    )
+    result: list[CameraSubscription] = [
+        CameraSubscription(user_id=user_id, camera_id=camera_id) for user_id, camera_id in db.execute(query)
+    ]
+    if len(result) < len(set(camera_ids)):
+        if not result and not user_exists(db, user_id):
+            db.rollback()
+            raise RecordNotFoundError(f"User {user_id} does not exist!")
+        if require_all_cameras:
+            missing_camera_ids: set[int] = set(camera_ids) - get_existing_camera_ids(db, camera_ids)
+            if missing_camera_ids:
+                db.rollback()
+                raise RecordNotFoundError(f"Cameras {sorted(missing_camera_ids)} not found!")
 
     db.commit()
 
@@ -62,43 +89,69 @@ def create_camera_subscriptions_by_user(db: Session, user_id: int, camera_ids: l
 
 
 def create_camera_subscriptions_by_camera(db: Session, camera_id: int, user_ids: list[int]) -> list[CameraSubscription]:
-    """Subscribes users to the given camera."""
-    db_camera: Camera | None = get_camera(db, camera_id)
-    # don't bother subscribing if the user doesn't exist
-    if not db_camera:
-        return []
+    """Subscribes users to the given camera.
 
-    # separate out the cameras that the user is already subscribed to
-    current_subscriptions: list[CameraSubscription] = get_camera_subscriptions_by_camera(db, camera_id)
-    subscribed_user_ids: set[int] = set([sub.user_id for sub in current_subscriptions])
-    unsubscribed_user_ids: set[int] = set(user_ids) - subscribed_user_ids
+    Users that are already subscribed are skipped, as are users that don't exist (or all of them if the camera doesn't
+    exist). All the subscriptions are added by a single INSERT ... SELECT statement, like
+    create_camera_subscriptions_by_user.
+    """
+    if not user_ids:
+        return []
 
-    # add the new camera subscriptions
-    result: list[CameraSubscription] = list()
-    for id in unsubscribed_user_ids:
-        user: User | None = get_user(db, id)
-        if user:
-            db_camera.users.append(user)
-            result.append(CameraSubscription(user_id=user.id, camera_id=camera_id))
+    new_subscriptions = (
+        select(User.id, literal(camera_id), literal(datetime.now(timezone.utc), DateTime))
+        .where(User.id.in_(user_ids), exists().where(Camera.id == camera_id))
+        .order_by(User.id)
+    )
+    query = (
+        _insert_subscriptions(db)
+        .from_select(["user_id", "camera_id", "registered_at"], new_subscriptions)
+        .on_conflict_do_nothing(index_elements=["user_id", "camera_id"])
+        .returning(CameraSubscriptionSchema.user_id, CameraSubscriptionSchema.camera_id)
+    )
+    result: list[CameraSubscription] = [
+        CameraSubscription(user_id=user_id, camera_id=camera_id) for user_id, camera_id in db.execute(query)
+    ]
 
     db.commit()
 
     return result
 
 
-def delete_camera_subscriptions_by_user(db: Session, user_id: int, camera_ids: list[int]) -> list[CameraSubscription]:
-    """Unsubscribes the user from a given list of cameras."""
-    db_user: User | None = get_user(db, user_id)
-    # don't bother subscribing if the user doesn't exist
-    if not db_user:
+def delete_camera_subscriptions_by_user(
+    db: Session, user_id: int, camera_ids: list[int], require_all_cameras: bool = False
+) -> list[CameraSubscription]:
+    """Unsubscribes the given user from a given list of cameras.
+
+    Cameras that the user isn't subscribed to are skipped, as are cameras that don't exist (unless require_all_cameras
+    is set). All the subscriptions are removed by a single DELETE ... RETURNING statement. The cameras and user are
+    only looked up separately if fewer subscriptions were removed than requested (see
+    create_camera_subscriptions_by_user).
+
+    Raises:
+        RecordNotFoundError: If the user doesn't exist, or if require_all_cameras is set and any of the cameras don't
+            exist (nothing is unsubscribed in either case).
+    """
+    if not camera_ids:
         return []
 
-    # unlink the cameras from the user
-    cameras: list[Camera] = get_cameras(db, camera_ids)
-    result: list[CameraSubscription] = list()
-    for camera in cameras:
-        db_user.cameras.remove(camera)
-        result.append(CameraSubscription(user_id=db_user.id, camera_id=camera.id))
+    query = (
+        delete(CameraSubscriptionSchema)
+        .where(CameraSubscriptionSchema.user_id == user_id, CameraSubscriptionSchema.camera_id.in_(camera_ids))
+        .returning(CameraSubscriptionSchema.user_id, CameraSubscriptionSchema.camera_id)
+    )
+    result: list[CameraSubscription] = [
+        CameraSubscription(user_id=user_id, camera_id=camera_id) for user_id, camera_id in db.execute(query)
+    ]
+    if len(result) < len(set(camera_ids)):
+        if not result and not user_exists(db, user_id):
+            db.rollback()
+            raise RecordNotFoundError(f"User {user_id} does not exist!")
+        if require_all_cameras:
+            missing_camera_ids: set[int] = set(camera_ids) - get_existing_camera_ids(db, camera_ids)
+            if missing_camera_ids:
+                db.rollback()
+                raise RecordNotFoundError(f"Cameras {sorted(missing_camera_ids)} not found!")
 
     db.commit()
 
@@ -106,18 +159,22 @@ def delete_camera_subscriptions_by_user(db: Session, user_id: int, camera_ids: l
 
 
 def delete_camera_subscriptions_by_camera(db: Session, camera_id: int, user_ids: list[int]) -> list[CameraSubscription]:
-    """Unsubscribes the given users from the given camera."""
-    db_camera: Camera | None = get_camera(db, camera_id)
-    # don't bother subscribing if the user doesn't exist
-    if not db_camera:
+    """Unsubscribes the given users from the given camera.
+
+    Users that aren't subscribed are skipped. All the subscriptions are removed by a single DELETE ... RETURNING
+    statement.
+    """
+    if not user_ids:
         return []
 
-    # unlink the cameras from the user
-    users: list[User] = get_users(db, user_ids)
-    result: list[CameraSubscription] = list()
-    for user in users:
-        db_camera.users.remove(user)
-        result.append(CameraSubscription(user_id=camera_id, camera_id=user.id))
+    query = (
+        delete(CameraSubscriptionSchema)
+        .where(CameraSubscriptionSchema.camera_id == camera_id, CameraSubscriptionSchema.user_id.in_(user_ids))
+        .returning(CameraSubscriptionSchema.user_id, CameraSubscriptionSchema.camera_id)
+    )
+    result: list[CameraSubscription] = [
+        CameraSubscription(user_id=user_id, camera_id=camera_id) for user_id, camera_id in db.execute(query)
+    ]
 
     db.commit()
 
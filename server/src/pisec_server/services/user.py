@@ -1,18 +1,24 @@
 """File containing crud functions related to the User table."""
 
+from collections.abc import Iterator
+
 from argon2 import PasswordHasher
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, exists, select
+from sqlalchemy.orm import Session, joinedload, raiseload
 
 from pisec_server.api.models.users import UserCreate, UserUpdate
 from pisec_server.core.config import settings
 from pisec_server.core.exceptions import InvalidDataError, RecordAlreadyExistsError, RecordNotFoundError
 from pisec_server.core.security.hashing import generate_hashed_password
-from pisec_server.db.db_models import User
+from pisec_server.db.db_models import CameraSubscription, User
+from pisec_server.services.utils import STREAM_BATCH_SIZE, add_and_commit
 
 
 def get_user(db: Session, user_id_or_email: int | str) -> User | None:
-    """Automatically chooses between getting a user by ID or email."""
+    """Automatically chooses between getting a user by ID or email.
+
+    Callers that already know which one they have should call get_user_by_id or get_user_by_email directly.
+    """
     if isinstance(user_id_or_email, int):
         return get_user_by_id(db, user_id_or_email)
     else:
@@ -20,13 +26,63 @@ def get_user(db: Session, user_id_or_email: int | str) -> User | None:
 
 
 def get_user_by_id(db: Session, user_id: int) -> User | None:
-    """Queries the database to get a user using the given ID."""
-    return db.query(User).filter(User.id == user_id).first()
+    """Gets a user using the given ID.
+
+    Users already loaded by the session (e.g. the current user) are returned from its identity map without querying
+    the database again.
+    """
+    return db.get(User, user_id)
+
+
+def user_exists(db: Session, user_id: int) -> bool:
+    """Checks if a user with the given ID exists without loading it."""
+    return bool(db.scalar(select(exists().where(User.id == user_id))))
+
+
+def get_user_with_cameras(db: Session, user_id: int) -> User | None:
+    """Gets a user using the given ID, loading the cameras they're subscribed to in the same query.
+
+    Used for authenticated users, as routes check their subscriptions to restrict access to cameras and videos. Any
+    other relationship raises an error instead of being lazy loaded, so routes can't silently query it per request.
+    """
+    return db.get(User, user_id, options=[joinedload(User.cameras), raiseload("*")])
+
+
+def get_subscribed_camera_ids(db: Session, user_id: int) -> set[int]:
+    """Gets the IDs of all cameras the given user is subscribed to.
+
+    Only the subscription table's camera ID column is read, so no camera rows are loaded.
+    """
+    return set(db.scalars(select(CameraSubscription.camera_id).where(CameraSubscription.user_id == user_id)))
 
 
 def get_user_by_email(db: Session, email: str) -> User | None:
-    """Queries the database to get a user using the given email address."""
-    return db.query(User).filter(User.email == email).first()
+    """Queries the database to get a user using the given email address (an indexed unique column)."""
+    return db.scalars(select(User).where(User.email == email)).first()
+
+
+def _select_users(
+    user_ids: list[int] | None,
+    email: str | None,
+    camera_ids: list[int] | None,
+    skip: int,
+    limit: int,
+    after_id: int | None,
+) -> Select[tuple[User]]:
+    """Builds the paginated query used by get_users and stream_users."""
+    query = select(User)
+    if user_ids:
+        query = query.where(User.id.in_(user_ids))
+    if email:
+        query = query.where(User.email.ilike(f"%{email}%"))
+    if camera_ids:
+        # Users subscribed to any of the cameras (a subquery rather than a join, so each user is only listed once)
+        subscribed_user_ids = select(CameraSubscription.user_id).where(CameraSubscription.camera_id.in_(camera_ids))
+        query = query.where(User.id.in_(subscribed_user_ids))
+    if after_id is not None:
+        query = query.where(User.id > after_id)
+
+    return query.order_by(User.id).offset(skip).limit(limit)
 
 
 def get_users(
@@ -36,21 +92,31 @@ def get_users(
     camera_ids: list[int] | None = None,
     skip: int = 0,
     limit: int = 100,
+    after_id: int | None = None,
 ) -> list[User]:
     """Queries and returns a list of all users with pagination.
 
-    If a list of IDs/emails were given, it will only return the given users (if they were found).
+    If a list of IDs/emails were given, it will only return the given users (if they were found). If a list of camera
+    IDs is given, only users subscribed to at least one of them are returned.
     Otherwise, it returns all users in the database (with pagination of course).
+    Users are ordered by ID, and after_id can be given to start after the last user of the previous page.
     """
-    query = select(User)
-    if user_ids:
-        query = query.where(User.id.in_(user_ids))
-    if email:
-        query = query.where(User.email.ilike(f"%{email}%"))
-    if camera_ids:
-        query = query.where(User.id.in_(camera_ids))
+    query = _select_users(user_ids, email, camera_ids, skip, limit, after_id)
+    return list(db.execute(query).scalars().all())
 
-    return list(db.execute(query.offset(skip).limit(limit)).scalars().all())
+
+def stream_users(
+    db: Session,
+    user_ids: list[int] | None = None,
+    email: str | None = None,
+    camera_ids: list[int] | None = None,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: int | None = None,
+) -> Iterator[User]:
+    """Same as get_users, but yields the users in batches as they're read from the database."""
+    query = _select_users(user_ids, email, camera_ids, skip, limit, after_id)
+    yield from db.scalars(query.execution_options(yield_per=STREAM_BATCH_SIZE))
 
 
 def create_user(db: Session, user: UserCreate) -> User:
@@ -58,7 +124,8 @@ def create_user(db: Session, user: UserCreate) -> User:
 
     The first registered user will automatically be made an admin if `ENABLE_FIRST_USER_ADMIN` env variable is True.
     """
-    is_first_user = db.query(User).count() == 0
+    # Only checks whether any user exists, rather than counting them all
+    is_first_user = not db.scalar(select(exists().select_from(User)))
     is_admin = is_first_user and settings.ENABLE_FIRST_USER_ADMIN
 
     # check if user with given email already exists
@@ -70,16 +137,12 @@ def create_user(db: Session, user: UserCreate) -> User:
         email=user.email, password_hash=generate_hashed_password(user.password, PasswordHasher()), is_admin=is_admin
     )
 
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-
-    return db_user
+    return add_and_commit(db, db_user)
 
 
 def update_user(db: Session, user_id: int, user: UserUpdate) -> User:
-    """Modifies a given user's parameters (excluding ID) via a given ID or email."""
-    db_user: User | None = get_user(db, user_id)
+    """Modifies a given user's parameters (excluding ID) via a given ID."""
+    db_user: User | None = get_user_by_id(db, user_id)
 
     # skip modifying the database if inputs are empty or if user doesn't exist
     if not user.model_fields_set:
@@ -103,8 +166,8 @@ def update_user(db: Session, user_id: int, user: UserUpdate) -> User:
 
 
 def delete_user(db: Session, user_id: int) -> User:
-    """Deletes a given user via ID or email."""
-    db_user: User | None = get_user(db, user_id)
+    """Deletes a given user via ID."""
+    db_user: User | None = get_user_by_id(db, user_id)
 
     if not db_user:
         raise RecordNotFoundError(f"User {user_id} does not exist!")
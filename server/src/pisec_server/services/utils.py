@@ -0,0 +1,21 @@
+"""Helper functions shared by the service modules."""
+
+from sqlalchemy.orm import Session
+
+from pisec_server.db.db_models import Base
+
+# Number of rows fetched from the database at a time when streaming results
+STREAM_BATCH_SIZE: int = 200
+
+
+def add_and_commit[RecordT: Base](db: Session, record: RecordT) -> RecordT:
+    """Adds a new record to the database and commits it, along with any other pending changes.
+
+    The record is flushed to get its generated values (e.g. its ID), then detached so committing doesn't expire it
+    (which would reload it with another query when it's read). Use this instead of `db.commit(); db.refresh(record)`.
+    """
+    db.add(record)
+    db.flush()
+    db.expunge(record)
+    db.commit()
+    return record
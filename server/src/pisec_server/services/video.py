@@ -1,17 +1,51 @@
 """File containing crud functions related to the Video table."""
 
-from sqlalchemy import select
+from collections.abc import Iterator, Set
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, Select, delete, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from pisec_server.api.models.videos import VideoUpdate
-from pisec_server.core.exceptions import RecordNotFoundError
-from pisec_server.db.db_models import Camera, Video
+from pisec_server.core.exceptions import RecordAccessDeniedError, RecordAlreadyExistsError, RecordNotFoundError
+from pisec_server.db.db_models import Camera, CameraSubscription, Video
 from pisec_server.services.camera import get_camera
+from pisec_server.services.utils import STREAM_BATCH_SIZE
 
 
 def get_video_entry(db: Session, video_id: int) -> Video | None:
     """Queries the database to get a video entry using the given ID."""
-    return db.query(Video).filter(Video.id == video_id).first()
+    return db.get(Video, video_id)
+
+
+def _select_video_entries(
+    video_ids: list[int] | None,
+    file_name: str | None,
+    camera_ids: list[int] | None,
+    skip: int,
+    limit: int,
+    subscribed_user_id: int | None,
+    after_id: int | None,
+) -> Select[tuple[Video]]:
+    """Builds the paginated query used by get_video_entries and stream_video_entries."""
+    query = select(Video)
+
+    if subscribed_user_id is not None:
+        query = query.join(CameraSubscription, CameraSubscription.camera_id == Video.camera_id).where(
+            CameraSubscription.user_id == subscribed_user_id
+        )
+    if video_ids:
+        query = query.where(Video.id.in_(video_ids))
+    if file_name:
+        query = query.where(Video.file_name.ilike(f"%{file_name}%"))
+    if camera_ids:
+        query = query.where(Video.camera_id.in_(camera_ids))
+    if after_id is not None:
+        query = query.where(Video.id > after_id)
+
+    return query.order_by(Video.id).offset(skip).limit(limit)
 
 
 def get_video_entries(
@@ -21,55 +55,119 @@ def get_video_entries(
     camera_ids: list[int] | None = None,
     skip: int = 0,
     limit: int = 100,
+    subscribed_user_id: int | None = None,
+    after_id: int | None = None,
 ) -> list[Video]:
     """Queries and returns a list of videos with pagination.
 
-    Allows filtering by likeness and also limiting results to chosen list of IDs.
+    Allows filtering by likeness and also limiting results to chosen list of IDs. If a subscribed user ID is given,
+    only videos from cameras that user is subscribed to are returned.
+
+    Videos are ordered by ID, and after_id can be given to start after the last video of the previous page (see
+    get_cameras).
     """
-    query = select(Video)
+    query = _select_video_entries(video_ids, file_name, camera_ids, skip, limit, subscribed_user_id, after_id)
+    return list(db.execute(query).scalars().all())
 
-    if video_ids:
-        query = query.where(Video.id.in_(video_ids))
-    if file_name:
-        query = query.where(Video.file_name.ilike(f"%{file_name}%"))
-    if camera_ids:
-        query = query.where(Video.camera_id.in_(camera_ids))
 
-    return list(db.execute(query.offset(skip).limit(limit)).scalars().all())
+def stream_video_entries(
+    db: Session,
+    video_ids: list[int] | None = None,
+    file_name: str | None = None,
+    camera_ids: list[int] | None = None,
+    skip: int = 0,
+    limit: int = 100,
+    subscribed_user_id: int | None = None,
+    after_id: int | None = None,
+) -> Iterator[Video]:
+    """Same as get_video_entries, but yields the videos in batches as they're read from the database."""
+    query = _select_video_entries(video_ids, file_name, camera_ids, skip, limit, subscribed_user_id, after_id)
+    yield from db.scalars(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+
+
+def _insert_videos(db: Session) -> postgresql.Insert | sqlite.Insert:
+    """Starts an INSERT into the videos table that supports ON CONFLICT clauses for the session's database."""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(Video)
+    return sqlite.insert(Video)
 
 
 def create_video_entry(db: Session, file_name: str, camera_id: int) -> Video:
-    """Creates a new video entry using the given inputs."""
-    # Check if the camera exists before creating the video entry
-    db_camera: Camera | None = get_camera(db, camera_id)
-    if not db_camera:
-        raise RecordNotFoundError(f"Failed to create video: Camera {camera_id} does not exist!")
+    """Creates a new video entry using the given inputs.
+
+    The entry is added by a single INSERT ... SELECT statement, which only inserts it if the camera exists and doesn't
+    already have a video with the same file name (enforced by a unique constraint, so concurrent uploads can't both
+    succeed). The camera is only looked up separately if nothing was inserted.
 
-    db_video = Video(file_name=file_name, camera_id=db_camera.id)
+    Raises:
+        RecordNotFoundError: If the camera doesn't exist.
+        RecordAlreadyExistsError: If the camera already has a video with the given file name.
+    """
+    new_video = select(literal(file_name), Camera.id, literal(datetime.now(timezone.utc), DateTime)).where(
+        Camera.id == camera_id
+    )
+    query = (
+        _insert_videos(db)
+        .from_select(["file_name", "camera_id", "uploaded_at"], new_video)
+        .on_conflict_do_nothing(index_elements=["camera_id", "file_name"])
+        .returning(Video)
+    )
+    db_video: Video | None = db.scalars(query).one_or_none()
 
-    db.add(db_video)
+    if not db_video:
+        db.rollback()
+        if not get_camera(db, camera_id):
+            raise RecordNotFoundError(f"Failed to create video: Camera {camera_id} does not exist!")
+        raise RecordAlreadyExistsError(f"Failed to create video: Camera {camera_id} already has {file_name}!")
+
+    # Detach the video so committing doesn't expire it (which would reload it when it's read)
+    db.expunge(db_video)
     db.commit()
 
     return db_video
 
 
-def update_video_entry(db: Session, video_id: int, new_video_data: VideoUpdate) -> Video:
+def update_video_entry(
+    db: Session, video_id: int, new_video_data: VideoUpdate, allowed_camera_ids: Set[int] | None = None
+) -> Video:
     """Modifies a given video entry's parameters (excluding ID) via a given ID.
 
-    You can only modify the name of the video for now.
+    You can only modify the name of the video for now. If allowed camera IDs are given, the video is only modified if
+    it belongs to one of those cameras. The access check, update and read back are done by a single UPDATE ...
+    RETURNING statement, the video is only looked up separately if nothing was updated.
+
+    Raises:
+        RecordNotFoundError: If the video doesn't exist.
+        RecordAccessDeniedError: If the video doesn't belong to any of the allowed cameras.
+        RecordAlreadyExistsError: If the video's camera already has a video with the new file name.
     """
-    db_video: Video | None = get_video_entry(db, video_id)
-    # Skip modifying the database if video doesn't exist
-    if not db_video:
-        raise RecordNotFoundError(f"Video {video_id} does not exist!")
+    # fields left as None will not be included in the dictionary
+    video_as_dict = new_video_data.model_dump(exclude_unset=True, exclude_none=True)
 
     # Skip modifying the database if inputs are empty
-    if not new_video_data.model_fields_set:
-        return db_video
-
-    if new_video_data.file_name:
-        db_video.file_name = new_video_data.file_name
+    if not video_as_dict:
+        db_video: Video | None = get_video_entry(db, video_id)
+    else:
+        query = update(Video).where(Video.id == video_id)
+        if allowed_camera_ids is not None:
+            query = query.where(Video.camera_id.in_(allowed_camera_ids))
+        try:
+            db_video = db.scalars(query.values(**video_as_dict).returning(Video)).one_or_none()
+        except IntegrityError as e:
+            # File names are unique per camera
+            db.rollback()
+            raise RecordAlreadyExistsError(f"Failed to update video {video_id}: File name is already in use!") from e
 
+    if not db_video:
+        db.rollback()
+        db_video = get_video_entry(db, video_id)
+        if not db_video:
+            raise RecordNotFoundError(f"Video {video_id} does not exist!")
+    if allowed_camera_ids is not None and db_video.camera_id not in allowed_camera_ids:
+        raise RecordAccessDeniedError(f"Not allowed to modify video {video_id}!")
+
+    # Detach the video so committing doesn't expire it (which would reload it when it's read)
+    db.expunge(db_video)
     db.commit()
 
     return db_video
@@ -77,7 +175,7 @@ def update_video_entry(db: Session, video_id: int, new_video_data: VideoUpdate)
 
 def delete_video_entry(db: Session, video_id: int) -> Video:
     """Deletes a given video entry via ID."""
-    db_video = db.query(Video).filter(Video.id == video_id).first()
+    db_video: Video | None = get_video_entry(db, video_id)
 
     if not db_video:
         raise RecordNotFoundError(f"Video {video_id} does not exist!")
@@ -86,3 +184,20 @@ def delete_video_entry(db: Session, video_id: int) -> Video:
     db.commit()
 
     return db_video
+
+
+def delete_video_entries_by_camera(db: Session, camera_id: int) -> list[Video]:
+    """Deletes all of a camera's video entries with a single DELETE ... RETURNING statement.
+
+    Returns the deleted videos, so their files can be removed too.
+    """
+    db_videos: list[Video] = sorted(
+        db.scalars(delete(Video).where(Video.camera_id == camera_id).returning(Video)), key=lambda video: video.id
+    )
+
+    # Detach the videos so committing doesn't expire them (which would fail to reload them when they're read)
+    for db_video in db_videos:
+        db.expunge(db_video)
+    db.commit()
+
+    return db_videos
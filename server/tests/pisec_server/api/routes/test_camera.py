@@ -0,0 +1,116 @@
+"""Test the camera endpoint."""
+
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from pisec_server.auth.dependencies import get_current_credential
+from pisec_server.db.db_models import CameraCredential, CameraSubscription, Video
+from pisec_server.main import app
+
+
+def test_read_camera(client: TestClient) -> None:
+    """Test the read camera endpoint."""
+    response = client.get("/api/v0/cameras/1")
+    assert response.status_code == 200
+    assert response.json() == {"id": 1, "name": "camera-1", "mac_address": "A1:B2:C3:D4:E5:F6"}
+    assert response.headers["Cache-Control"] == "private, max-age=60"
+    assert response.headers["Vary"] == "Authorization"
+    assert response.headers["ETag"]
+
+
+def test_read_camera_not_modified(client: TestClient) -> None:
+    """Test that reading an unchanged camera again with its ETag returns an empty 304 response."""
+    etag: str = client.get("/api/v0/cameras/1").headers["ETag"]
+
+    response = client.get("/api/v0/cameras/1", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+
+def test_read_camera_not_found(client: TestClient) -> None:
+    """Test that reading a camera that doesn't exist returns a 404 error."""
+    response = client.get("/api/v0/cameras/99")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Camera not found!"}
+
+
+def test_read_cameras_stream(client: TestClient) -> None:
+    """Test that cameras can be streamed as newline-delimited JSON."""
+    response = client.get("/api/v0/cameras/", params={"stream": True, "page_size": 2})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.text.splitlines() == [
+        '{"id":1,"name":"camera-1","mac_address":"A1:B2:C3:D4:E5:F6"}',
+        '{"id":2,"name":"camera-2","mac_address":"F6:E5:D4:C3:B2:A1"}',
+    ]
+
+
+def test_update_camera(camera_client: TestClient) -> None:
+    """Test that a camera can update its own details."""
+    response = camera_client.put("/api/v0/cameras/1", json={"name": "camera-renamed"})
+    assert response.status_code == 200
+    assert response.json() == {"id": 1, "name": "camera-renamed", "mac_address": "A1:B2:C3:D4:E5:F6"}
+    assert camera_client.get("/api/v0/cameras/1").json()["name"] == "camera-renamed"
+
+
+def test_delete_camera(camera_client: TestClient) -> None:
+    """Test that a camera can delete itself, even while users are subscribed to it."""
+    assert camera_client.post("/api/v0/users/1/subscriptions/1").status_code == 200
+
+    response = camera_client.delete("/api/v0/cameras/1")
+    assert response.status_code == 200
+    assert response.json() == {"id": 1, "name": "camera-1", "mac_address": "A1:B2:C3:D4:E5:F6"}
+    assert camera_client.get("/api/v0/cameras/1").status_code == 404
+
+
+def test_delete_camera_with_videos(camera_client: TestClient, db_session: Session) -> None:
+    """Test that a camera can't be deleted while it still has videos."""
+    file_name = "video-2025-01-01_12-00-00.mp4"
+    db_session.add(Video(file_name=file_name, camera_id=1, uploaded_at=datetime.now(timezone.utc)))
+    db_session.commit()
+
+    response = camera_client.delete("/api/v0/cameras/1")
+    assert response.status_code == 409
+    assert response.json() == {"detail": "Camera still has videos!"}
+    assert [video.file_name for video in db_session.scalars(select(Video))] == [file_name]
+    assert camera_client.get("/api/v0/cameras/1").status_code == 200
+
+
+def test_read_cameras_after_id(client: TestClient) -> None:
+    """Test that cameras can be paginated by the ID of the last camera of the previous page."""
+    response = client.get("/api/v0/cameras/", params={"after_id": 1, "page_size": 1})
+    assert response.status_code == 200
+    assert [camera["id"] for camera in response.json()] == [2]
+
+
+def test_read_cameras_page_size_limit(client: TestClient) -> None:
+    """Test that pages larger than the maximum page size are rejected."""
+    response = client.get("/api/v0/cameras/", params={"page_size": 1001})
+    assert response.status_code == 422
+
+
+def test_create_camera(client: TestClient, db_session: Session) -> None:
+    """Test that creating a camera subscribes the credential's owner to it."""
+    credential = CameraCredential(client_id="2:1", user_id=2, client_secret_hash="secret")
+    db_session.add(credential)
+    db_session.commit()
+    app.dependency_overrides[get_current_credential] = lambda: credential
+
+    response = client.post("/api/v0/cameras/", json={"name": "camera-4", "mac_address": "B1:B2:B3:B4:B5:B6"})
+    assert response.status_code == 200
+    camera_id: int = response.json()["id"]
+    assert db_session.get(CameraSubscription, (2, camera_id)) is not None
+
+
+def test_read_camera_users(client: TestClient) -> None:
+    """Test that only the users subscribed to a camera are listed."""
+    assert client.post("/api/v0/users/2/subscriptions/3").status_code == 200
+
+    response = client.get("/api/v0/cameras/3/users")
+    assert response.status_code == 200
+    assert [user["id"] for user in response.json()] == [2]
+    assert client.get("/api/v0/cameras/2/users").json() == []
@@ -1,5 +1,7 @@
 """Test the user endpoint."""
 
+import json
+
 from fastapi.testclient import TestClient
 
 
@@ -8,3 +10,64 @@ def test_read_current_user(client: TestClient) -> None:
     response = client.get("/api/v0/users/me")
     assert response.status_code == 200
     assert response.json() == {"id": 1, "email": "user1@test.com", "is_admin": True}
+
+
+def test_read_users_stream(client: TestClient) -> None:
+    """Test that users can be streamed as newline-delimited JSON."""
+    response = client.get("/api/v0/users/", params={"stream": True})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == [1, 2]
+
+
+def test_create_camera_subscriptions_missing_cameras(client: TestClient) -> None:
+    """Test that subscribing to cameras that don't exist reports every missing camera."""
+    response = client.post("/api/v0/users/2/subscriptions/?camera_id=1&camera_id=9&camera_id=7")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Failed to apply subscriptions: Cameras [7, 9] not found!"}
+
+    # None of the cameras should have been subscribed to
+    response = client.post("/api/v0/users/2/subscriptions/1")
+    assert response.status_code == 200
+
+
+def test_delete_camera_subscriptions_missing_cameras(client: TestClient) -> None:
+    """Test that unsubscribing from cameras that don't exist reports every missing camera."""
+    assert client.post("/api/v0/users/2/subscriptions/1").status_code == 200
+
+    response = client.request("DELETE", "/api/v0/users/2/subscriptions/?camera_id=1&camera_id=9&camera_id=7")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Failed to unsubscribe: Cameras [7, 9] not found!"}
+
+    # None of the cameras should have been unsubscribed from
+    response = client.request("DELETE", "/api/v0/users/2/subscriptions/?camera_id=1")
+    assert response.json() == [{"user_id": 2, "camera_id": 1}]
+
+
+def test_camera_subscriptions_skip_existing(client: TestClient) -> None:
+    """Test that subscribing and unsubscribing only returns the subscriptions that were changed."""
+    response = client.post("/api/v0/users/2/subscriptions/?camera_id=1&camera_id=2")
+    assert response.status_code == 200
+    assert response.json() == [{"user_id": 2, "camera_id": 1}, {"user_id": 2, "camera_id": 2}]
+
+    response = client.post("/api/v0/users/2/subscriptions/?camera_id=2&camera_id=3")
+    assert response.status_code == 200
+    assert response.json() == [{"user_id": 2, "camera_id": 3}]
+
+    response = client.request("DELETE", "/api/v0/users/2/subscriptions/?camera_id=1&camera_id=3")
+    assert response.status_code == 200
+    assert sorted(response.json(), key=lambda sub: sub["camera_id"]) == [
+        {"user_id": 2, "camera_id": 1},
+        {"user_id": 2, "camera_id": 3},
+    ]
+
+    response = client.request("DELETE", "/api/v0/users/2/subscriptions/?camera_id=1")
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_create_camera_subscription_missing_user(client: TestClient) -> None:
+    """Test that subscribing a user that doesn't exist returns a 404 error."""
+    response = client.post("/api/v0/users/99/subscriptions/1")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "User not found!"}
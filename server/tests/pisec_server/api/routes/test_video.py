@@ -0,0 +1,107 @@
+"""Test the video endpoint."""
+
+import shutil
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from pisec_server.core.config import settings
+
+FILE_NAME = "video-2025-01-01_12-00-00.mp4"
+
+
+@pytest.fixture(autouse=True)
+def video_dir(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """Stores uploaded videos in a temporary directory."""
+    monkeypatch.setattr(settings, "VIDEO_FILES_DIR", tmp_path)
+    return tmp_path
+
+
+def test_upload_video(camera_client: TestClient, video_dir: Path) -> None:
+    """Test that an uploaded video is stored and recorded."""
+    response = camera_client.post(
+        "/api/v0/videos/",
+        data={"file_name": FILE_NAME},
+        files={"video_file": (FILE_NAME, b"video data", "video/mp4")},
+    )
+    assert response.status_code == 200
+    assert response.json()["file_name"] == FILE_NAME
+    assert response.json()["camera_id"] == 1
+    assert (video_dir / "1" / FILE_NAME).read_bytes() == b"video data"
+
+
+def test_upload_video_dir_removed(camera_client: TestClient, video_dir: Path) -> None:
+    """Test that a camera's video directory is created again if it's removed while the server is running."""
+    files = {"video_file": (FILE_NAME, b"video data", "video/mp4")}
+    assert camera_client.post("/api/v0/videos/", data={"file_name": FILE_NAME}, files=files).status_code == 200
+    shutil.rmtree(video_dir / "1")
+
+    other_file_name = "video-2025-01-02_12-00-00.mp4"
+    files = {"video_file": (other_file_name, b"other data", "video/mp4")}
+    response = camera_client.post("/api/v0/videos/", data={"file_name": other_file_name}, files=files)
+    assert response.status_code == 200
+    assert (video_dir / "1" / other_file_name).read_bytes() == b"other data"
+
+
+def test_upload_video_already_exists(camera_client: TestClient, video_dir: Path) -> None:
+    """Test that uploading the same video twice fails without overwriting the stored file."""
+    files = {"video_file": (FILE_NAME, b"video data", "video/mp4")}
+    assert camera_client.post("/api/v0/videos/", data={"file_name": FILE_NAME}, files=files).status_code == 200
+
+    files = {"video_file": (FILE_NAME, b"other data", "video/mp4")}
+    response = camera_client.post("/api/v0/videos/", data={"file_name": FILE_NAME}, files=files)
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Video already exists!"}
+    assert (video_dir / "1" / FILE_NAME).read_bytes() == b"video data"
+    assert [path.name for path in (video_dir / "1").iterdir()] == [FILE_NAME]  # The temporary file is removed
+
+
+def test_upload_video_not_a_video(camera_client: TestClient) -> None:
+    """Test that uploading a file without a video MIME type fails."""
+    response = camera_client.post(
+        "/api/v0/videos/",
+        data={"file_name": FILE_NAME},
+        files={"video_file": (FILE_NAME, b"video data", "application/x-novideo")},
+    )
+    assert response.status_code == 415
+
+
+def test_update_video_already_exists(camera_client: TestClient) -> None:
+    """Test that renaming a video to the name of another of the camera's videos fails."""
+    other_file_name = "video-2025-01-02_12-00-00.mp4"
+    for file_name in (FILE_NAME, other_file_name):
+        files = {"video_file": (file_name, b"video data", "video/mp4")}
+        assert camera_client.post("/api/v0/videos/", data={"file_name": file_name}, files=files).status_code == 200
+
+    response = camera_client.put("/api/v0/videos/2", json={"file_name": FILE_NAME})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Video already exists!"}
+    assert camera_client.get("/api/v0/videos/2").json()["file_name"] == other_file_name
+
+
+def test_delete_camera_videos(camera_client: TestClient, video_dir: Path) -> None:
+    """Test that all of a camera's videos and their files are deleted."""
+    files = {"video_file": (FILE_NAME, b"video data", "video/mp4")}
+    video_id: int = camera_client.post("/api/v0/videos/", data={"file_name": FILE_NAME}, files=files).json()["id"]
+
+    response = camera_client.delete("/api/v0/cameras/1/videos")
+    assert response.status_code == 200
+    assert [video["id"] for video in response.json()] == [video_id]
+    assert not (video_dir / "1" / FILE_NAME).exists()
+    assert camera_client.get(f"/api/v0/videos/{video_id}").status_code == 404
+
+
+def test_delete_camera_videos_file_not_removed(
+    camera_client: TestClient, video_dir: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Test that files which can't be removed are logged, while their videos are still deleted."""
+    files = {"video_file": (FILE_NAME, b"video data", "video/mp4")}
+    assert camera_client.post("/api/v0/videos/", data={"file_name": FILE_NAME}, files=files).status_code == 200
+    (video_dir / "1" / FILE_NAME).unlink()
+    (video_dir / "1" / FILE_NAME).mkdir()  # Can't be removed as a file
+
+    response = camera_client.delete("/api/v0/cameras/1/videos")
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    assert "Failed to remove video file" in caplog.text
@@ -0,0 +1,51 @@
+"""Tests for the auth services module."""
+
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import pytest
+
+from pisec_server.auth.exceptions import TokenDecodingError
+from pisec_server.auth.models import TokenPayload, TokenPayloadCreate, TokenSubjectType
+from pisec_server.auth.services import create_access_token, decode_access_token
+from pisec_server.core.config import settings
+
+
+def test_decode_access_token_cached() -> None:
+    """Test that decoding the same token twice returns the cached payload."""
+    token: str = create_access_token(TokenPayloadCreate(sub="1", sub_type=TokenSubjectType.USER))
+
+    payload: TokenPayload = decode_access_token(token)
+    assert payload.sub == "1"
+    assert payload.sub_type == TokenSubjectType.USER
+    assert payload.exp > payload.iat
+    assert decode_access_token(token) is payload
+
+
+def test_decode_access_token_expired() -> None:
+    """Test that expired tokens are rejected."""
+    token: str = create_access_token(
+        TokenPayloadCreate(sub="1", sub_type=TokenSubjectType.USER), expires_delta=timedelta(minutes=-1)
+    )
+
+    with pytest.raises(TokenDecodingError):
+        _ = decode_access_token(token)
+
+
+def test_decode_access_token_invalid() -> None:
+    """Test that malformed tokens are rejected."""
+    with pytest.raises(TokenDecodingError):
+        _ = decode_access_token("not-a-token")
+
+
+def test_decode_access_token_unknown_subject_type() -> None:
+    """Test that tokens with an unknown subject type are rejected."""
+    now = datetime.now(timezone.utc)
+    token: str = jwt.encode(
+        {"sub": "1", "sub_type": "robot", "exp": now + timedelta(minutes=5), "iat": now},
+        settings.SECRET_KEY,
+        algorithm=settings.JWT_ALGORITHM,
+    )
+
+    with pytest.raises(TokenDecodingError):
+        _ = decode_access_token(token)
@@ -6,7 +6,7 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
-from pisec_server.auth.dependencies import get_current_user
+from pisec_server.auth.dependencies import get_current_credential, get_current_user
 from pisec_server.db.database import GeneralDBConnector, get_db
 from pisec_server.db.db_models import Base, Camera, CameraCredential, User
 from pisec_server.main import app
@@ -95,6 +95,13 @@ def get_current_test_admin_user() -> User:
     return user
 
 
+def get_current_test_credential() -> CameraCredential:
+    """Returns the 'logged in' camera credential from the test database. This overrides a dependency."""
+    credential: CameraCredential | None = db_connector.get_session().get(CameraCredential, "1:1")
+    assert credential is not None  # If test db was set up correctly, this should always be true
+    return credential
+
+
 """Pytest fixtures"""
 
 
@@ -115,3 +122,16 @@ def client() -> Generator[TestClient, None, None]:
 
     # Undo the overrides
     app.dependency_overrides.clear()
+
+
+@pytest.fixture()
+def camera_client(client: TestClient) -> TestClient:
+    """Fixture for getting a fastapi test client that is also logged in as a camera."""
+    app.dependency_overrides[get_current_credential] = get_current_test_credential
+    return client
+
+
+@pytest.fixture()
+def db_session(client: TestClient) -> Generator[Session, None, None]:
+    """Fixture for querying the test database directly (e.g. to set up or check records)."""
+    yield from get_test_db()
@@ -0,0 +1,22 @@
+"""Tests for the config module."""
+
+import pytest
+
+from pisec_server.core.config import _get_positive_int  # pyright: ignore[reportPrivateUsage]
+
+
+def test_get_positive_int(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that positive integers are loaded, and the default is used when the variable isn't set."""
+    monkeypatch.setenv("TEST_POSITIVE_INT", "8")
+    assert _get_positive_int("TEST_POSITIVE_INT", 40) == 8
+
+    monkeypatch.delenv("TEST_POSITIVE_INT")
+    assert _get_positive_int("TEST_POSITIVE_INT", 40) == 40
+
+
+@pytest.mark.parametrize("value", ["0", "-1", "many"])
+def test_get_positive_int_invalid(monkeypatch: pytest.MonkeyPatch, value: str) -> None:
+    """Test that values which aren't positive integers are rejected."""
+    monkeypatch.setenv("TEST_POSITIVE_INT", value)
+    with pytest.raises(ValueError):
+        _ = _get_positive_int("TEST_POSITIVE_INT", 40)
@@ -32,3 +32,19 @@ def test_invalid_password_validator() -> None:
 
     with pytest.raises(ValueError):
         [password_validator(password) for password in invalid_passwords]
+
+
+@pytest.mark.parametrize(
+    ("password", "message"),
+    [
+        ("abc123!@#", "uppercase"),
+        ("ABC123!@#", "lowercase"),
+        ("Abcdef!@#", "number"),
+        ("Abc123456", "special"),
+        ("Äbc123!@#", "uppercase"),  # Only ASCII letters count
+    ],
+)
+def test_password_validator_missing_character_class(password: str, message: str) -> None:
+    """Test that the password validator reports which character class is missing."""
+    with pytest.raises(ValueError, match=message):
+        _ = password_validator(password)
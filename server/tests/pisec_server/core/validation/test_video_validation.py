@@ -37,3 +37,6 @@ def test_get_video_file_path_safe_invalid() -> None:
         _ = get_video_file_path_safe("$!A.fdguhs2p4.", 2)
     with pytest.raises(InvalidFileNameError):
         _ = get_video_file_path_safe("\n3()f{`'print(1)}.p4", 3)
+    # Only the start of the name matches the pattern
+    with pytest.raises(InvalidFileNameError):
+        _ = get_video_file_path_safe("video-2026-01-11_14-38-32.mp4.sh", 4)